@@ -1,6 +1,7 @@
 
-from flask import Flask, request, jsonify, render_template, session, redirect, url_for
+from flask import Flask, request, jsonify, render_template, session, redirect, url_for, g
 from flask_cors import CORS
+from flask.json.provider import DefaultJSONProvider
 import yfinance as yf
 import pandas as pd
 import numpy as np
@@ -10,26 +11,55 @@ import sqlite3
 import os
 from werkzeug.security import generate_password_hash, check_password_hash
 import json
+import re
 import logging
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import time
 from time import sleep
 import threading
+import queue
+from contextlib import contextmanager
 import ta
-import matplotlib.pyplot as plt
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from scipy.signal import lfilter
+from numpy.lib.stride_tricks import sliding_window_view
 import io
 import base64
 from textblob import TextBlob
 from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 from dotenv import load_dotenv
 import concurrent.futures
+from collections import defaultdict
+from bisect import bisect_right
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from langdetect import detect, DetectorFactory
 
+try:
+    import orjson
+except ImportError:  # optional: Flask's stdlib JSON provider is used instead
+    orjson = None
+
+try:
+    import ahocorasick
+except ImportError:  # optional: keyword matching falls back to a linear scan
+    ahocorasick = None
+
+try:
+    from argon2 import PasswordHasher
+    from argon2.exceptions import VerificationError, InvalidHashError
+except ImportError:  # optional: werkzeug's PBKDF2 hashing is used instead
+    PasswordHasher = None
+
+try:
+    from flask_compress import Compress
+except ImportError:  # optional: responses are sent uncompressed
+    Compress = None
+
 from config import Config
 from utils.data_fetcher import DataFetcher
-from utils.helpers import is_market_open, normalize_stock_symbol
+from utils.helpers import is_market_open, normalize_stock_symbol, strip_exchange_suffix, json_serializer
 from models.ai_assistant import AIAssistant
 from models.stock_predictor import StockPredictor
 from models.sentiment_analyzer import SentimentAnalyzer
@@ -40,8 +70,45 @@ logger = logging.getLogger(__name__)
 # Load environment variables from .env if present
 load_dotenv()
 
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider that serializes responses with orjson"""
+    
+    # Keys are emitted in insertion order; sorting every payload costs more than
+    # it is worth since no client depends on key order
+    sort_keys = False
+    
+    @staticmethod
+    def default(obj):
+        try:
+            return json_serializer(obj)
+        except Exception:
+            return DefaultJSONProvider.default(obj)
+    
+    def _options(self, indent=False):
+        option = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        if self.sort_keys:
+            option |= orjson.OPT_SORT_KEYS
+        return option | orjson.OPT_INDENT_2 if indent else option
+    
+    def dumps(self, obj, **kwargs):
+        return orjson.dumps(obj, default=self.default, option=self._options(bool(kwargs.get('indent')))).decode()
+    
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        body = orjson.dumps(obj, default=self.default, option=self._options(indent))
+        return self._app.response_class(body, mimetype=self.mimetype)
+
 app = Flask(__name__)
+if orjson is not None:
+    app.json = OrjsonProvider(app)
 CORS(app)
+if Compress is not None:
+    # Chart payloads for long periods run to tens of KB of JSON; small responses
+    # are not worth the compression overhead
+    app.config['COMPRESS_ALGORITHM'] = ['br', 'gzip']
+    app.config['COMPRESS_MIN_SIZE'] = 2048
+    Compress(app)
 app.secret_key = 'your-secret-key-here-change-this-in-production'
 config = Config()
 data_fetcher = DataFetcher()
@@ -49,6 +116,11 @@ ai_assistant = AIAssistant()
 stock_predictor = StockPredictor()
 sentiment_service = SentimentAnalyzer()
 
+# Keep-alive session reused by the assistant's outbound API calls
+HTTP = requests.Session()
+HTTP.mount('https://', HTTPAdapter(pool_connections=16, pool_maxsize=32,
+                                   max_retries=Retry(total=2, backoff_factor=0.3)))
+
 # Ensure deterministic language detection
 DetectorFactory.seed = 0
 
@@ -65,33 +137,125 @@ except Exception as e:
     logger.error(f"Failed to initialize VADER: {e}")
     vader_analyzer = None
 
+# UTC ISO timestamp, recomputed at most once per second
+_iso_cache = (0, '')
+
+def now_iso() -> str:
+    global _iso_cache
+    t = int(time.time())
+    cached_t, cached_s = _iso_cache
+    if cached_t != t:
+        cached_s = datetime.utcfromtimestamp(t).isoformat() + 'Z'
+        _iso_cache = (t, cached_s)
+    return cached_s
+
 # Market indices endpoint
 @app.route('/api/market-indices')
 def get_market_indices_api():
     try:
         indices = data_fetcher.get_market_indices()
         shaped = {}
-        now_iso = datetime.utcnow().isoformat() + 'Z'
+        ts = now_iso()
         for name, val in indices.items():
             shaped[name] = {
                 'current_price': val.get('current_price', 0),
                 'change': val.get('change', 0),
                 'change_pct': val.get('change_percent', 0),
-                'timestamp': now_iso
+                'timestamp': ts
             }
         return jsonify({
             'indices': shaped,
             'market_open': is_market_open(),
-            'timestamp': now_iso
+            'timestamp': ts
         })
     except Exception as e:
         logger.error(f"Market indices error: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Shared SQLite connection pool (WAL mode lets readers run alongside a writer).
+# Connections are opened on demand; at most DB_POOL_SIZE idle ones are kept.
+DB_PATH = 'stock_app.db'
+DB_POOL_SIZE = 8
+DB_STATEMENT_CACHE_SIZE = 256
+DB_MMAP_SIZE = 256 * 1024 * 1024
+_pool = queue.Queue(maxsize=DB_POOL_SIZE)
+
+def _open_db_connection():
+    # Pooled connections live long enough for the per-connection statement cache to pay off
+    conn = sqlite3.connect(DB_PATH, check_same_thread=False, cached_statements=DB_STATEMENT_CACHE_SIZE)
+    # Rows index by position as before and also by column name
+    conn.row_factory = sqlite3.Row
+    conn.execute('PRAGMA journal_mode=WAL')
+    conn.execute('PRAGMA synchronous=NORMAL')
+    conn.execute('PRAGMA busy_timeout=5000')
+    conn.execute('PRAGMA cache_size=-20000')
+    conn.execute('PRAGMA temp_store=MEMORY')
+    conn.execute(f'PRAGMA mmap_size={DB_MMAP_SIZE}')
+    return conn
+
+def _acquire_db_connection():
+    try:
+        return _pool.get_nowait()
+    except queue.Empty:
+        return _open_db_connection()
+
+def _release_db_connection(conn):
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        _pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
+
+@contextmanager
+def db():
+    """Borrow a pooled connection; uncommitted work is rolled back on error"""
+    conn = _acquire_db_connection()
+    try:
+        yield conn
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        _release_db_connection(conn)
+
+def get_conn():
+    """Return this request's pooled connection.
+
+    Use as ``with get_conn() as conn:`` to commit on success and roll back on error;
+    the connection goes back to the pool when the app context tears down.
+    """
+    if 'db_conn' not in g:
+        g.db_conn = _acquire_db_connection()
+    return g.db_conn
+
+@app.teardown_appcontext
+def _return_db_connection(exc):
+    conn = g.pop('db_conn', None)
+    if conn is not None:
+        _release_db_connection(conn)
+
+# Alert conditions ("price>=2500" etc.) are parsed once when stored. Codes index
+# ALERT_OPERATORS; two-character operators come first so they match before > and <.
+ALERT_OPERATORS = ('>=', '<=', '>', '<')
+
+def parse_alert_condition(condition: str) -> Optional[tuple]:
+    """Parse a condition into (op_code, threshold), or None if it is not understood"""
+    # very basic parser: supports price>n, price<n, price>=n, price<=n
+    cond = condition.replace(' ', '').lower()
+    for op_code, op in enumerate(ALERT_OPERATORS):
+        if cond.startswith('price' + op):
+            try:
+                return op_code, float(cond.split(op)[1])
+            except (ValueError, IndexError):
+                return None
+    return None
+
 # Initialize database
 def init_db():
     try:
-        conn = sqlite3.connect('stock_app.db')
+        # A pooled connection, so the schema is created with WAL mode already on
+        conn = _acquire_db_connection()
         c = conn.cursor()
         
         # Users table
@@ -163,10 +327,43 @@ def init_db():
                       condition TEXT NOT NULL, -- e.g., price>2500
                       note TEXT,
                       created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                      op_code INTEGER, -- index into ALERT_OPERATORS; NULL if unparseable
+                      threshold REAL,
+                      FOREIGN KEY (user_id) REFERENCES users (id))''')
+        
+        # Alert notifications: one row per alert, written the first time it triggers
+        c.execute('''CREATE TABLE IF NOT EXISTS notifications
+                     (id INTEGER PRIMARY KEY AUTOINCREMENT,
+                      alert_id INTEGER NOT NULL UNIQUE,
+                      user_id INTEGER NOT NULL,
+                      symbol TEXT NOT NULL,
+                      condition TEXT NOT NULL,
+                      created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                      FOREIGN KEY (alert_id) REFERENCES alerts (id),
                       FOREIGN KEY (user_id) REFERENCES users (id))''')
         
+        # Older databases: add the parsed-condition columns and fill them in
+        alert_columns = {row[1] for row in c.execute('PRAGMA table_info(alerts)')}
+        if 'op_code' not in alert_columns:
+            c.execute('ALTER TABLE alerts ADD COLUMN op_code INTEGER')
+            c.execute('ALTER TABLE alerts ADD COLUMN threshold REAL')
+            parsed = [(parse_alert_condition(cond), aid) for aid, cond in c.execute('SELECT id, condition FROM alerts').fetchall()]
+            c.executemany('UPDATE alerts SET op_code = ?, threshold = ? WHERE id = ?',
+                          [(p[0], p[1], aid) for p, aid in parsed if p is not None])
+
+        # Indices for the per-user lookups (positions is already covered by UNIQUE(user_id, symbol)).
+        # Orders are listed newest first, so index them by id within each user.
+        c.execute('DROP INDEX IF EXISTS idx_orders_user')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_orders_user_recent ON orders(user_id, id DESC)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_alerts_user ON alerts(user_id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_notifications_user ON notifications(user_id)')
+        c.execute('CREATE INDEX IF NOT EXISTS idx_portfolio_user ON portfolio(user_id)')
+        
+        # Notifications left behind by alerts deleted before deletes cascaded to them
+        c.execute('DELETE FROM notifications WHERE alert_id NOT IN (SELECT id FROM alerts)')
+        
         conn.commit()
-        conn.close()
+        _release_db_connection(conn)
         logger.info("Database initialized successfully")
     except Exception as e:
         logger.error(f"Database initialization failed: {e}")
@@ -174,9 +371,10 @@ def init_db():
 # Initialize database on startup
 init_db()
 
-# Enhanced stock database
+# Enhanced stock database. Categories are tuples: they are shared, read-only
+# state across request threads
 COMPREHENSIVE_STOCKS = {
-    'safe': [
+    'safe': (
         {'symbol': 'HDFCBANK', 'name': 'HDFC Bank', 'sector': 'Banking', 'keywords': ['hdfc', 'bank', 'banking']},
         {'symbol': 'TCS', 'name': 'Tata Consultancy Services', 'sector': 'IT', 'keywords': ['tcs', 'tata', 'consultancy', 'it']},
         {'symbol': 'INFY', 'name': 'Infosys', 'sector': 'IT', 'keywords': ['infosys', 'infy', 'it', 'technology']},
@@ -187,8 +385,8 @@ COMPREHENSIVE_STOCKS = {
         {'symbol': 'ITC', 'name': 'ITC Limited', 'sector': 'FMCG', 'keywords': ['itc', 'cigarette', 'fmcg']},
         {'symbol': 'HINDUNILVR', 'name': 'Hindustan Unilever', 'sector': 'FMCG', 'keywords': ['hul', 'unilever', 'fmcg']},
         {'symbol': 'NESTLEIND', 'name': 'Nestle India', 'sector': 'FMCG', 'keywords': ['nestle', 'food', 'fmcg']},
-    ],
-    'volatile': [
+    ),
+    'volatile': (
         {'symbol': 'RELIANCE', 'name': 'Reliance Industries', 'sector': 'Oil & Gas', 'keywords': ['reliance', 'oil', 'gas', 'petrochemical']},
         {'symbol': 'ADANIPORTS', 'name': 'Adani Ports', 'sector': 'Infrastructure', 'keywords': ['adani', 'port', 'logistics']},
         {'symbol': 'BAJFINANCE', 'name': 'Bajaj Finance', 'sector': 'NBFC', 'keywords': ['bajaj', 'finance', 'nbfc']},
@@ -199,8 +397,8 @@ COMPREHENSIVE_STOCKS = {
         {'symbol': 'LT', 'name': 'Larsen & Toubro', 'sector': 'Construction', 'keywords': ['lt', 'larsen', 'toubro', 'construction']},
         {'symbol': 'ONGC', 'name': 'Oil & Natural Gas Corporation', 'sector': 'Oil & Gas', 'keywords': ['ongc', 'oil', 'gas']},
         {'symbol': 'NTPC', 'name': 'NTPC Limited', 'sector': 'Power', 'keywords': ['ntpc', 'power', 'electricity']},
-    ],
-    'highly_volatile': [
+    ),
+    'highly_volatile': (
         {'symbol': 'ADANIENT', 'name': 'Adani Enterprises', 'sector': 'Conglomerate', 'keywords': ['adani', 'enterprise', 'conglomerate']},
         {'symbol': 'TATAMOTORS', 'name': 'Tata Motors', 'sector': 'Automotive', 'keywords': ['tata', 'motor', 'car', 'auto']},
         {'symbol': 'ZEEL', 'name': 'Zee Entertainment', 'sector': 'Media', 'keywords': ['zee', 'entertainment', 'media']},
@@ -211,9 +409,70 @@ COMPREHENSIVE_STOCKS = {
         {'symbol': 'VEDL', 'name': 'Vedanta Limited', 'sector': 'Mining', 'keywords': ['vedanta', 'mining', 'metal']},
         {'symbol': 'JSWSTEEL', 'name': 'JSW Steel', 'sector': 'Steel', 'keywords': ['jsw', 'steel', 'metal']},
         {'symbol': 'TATASTEEL', 'name': 'Tata Steel', 'sector': 'Steel', 'keywords': ['tata', 'steel', 'metal']},
-    ]
+    )
 }
 
+# Lookup indices over COMPREHENSIVE_STOCKS, built once at import
+_ALL_STOCKS = [s for stocks in COMPREHENSIVE_STOCKS.values() for s in stocks]
+_BY_SYMBOL = {s['symbol'].lower(): s for s in _ALL_STOCKS}
+_NAMES = [(s['name'].lower(), s) for s in _ALL_STOCKS]
+_KEYWORDS = [(kw, s) for s in _ALL_STOCKS for kw in s['keywords']]
+
+class _SubstringIndex:
+    """Finds the first (text, stock) entry whose text contains a fragment.
+
+    The texts are joined into one string so the search is a single str.find;
+    the start offsets map a hit back to its entry, and since find returns the
+    lowest offset the earliest-listed entry wins.
+    """
+    _SEP = '\x00'
+
+    def __init__(self, entries):
+        self._stocks = [stock for _, stock in entries]
+        self._blob = self._SEP.join(text for text, _ in entries)
+        self._offsets = []
+        offset = 0
+        for text, _ in entries:
+            self._offsets.append(offset)
+            offset += len(text) + len(self._SEP)
+
+    def position(self, fragment: str) -> Optional[int]:
+        """Index of the first entry containing fragment, or None"""
+        if self._SEP in fragment:
+            return None
+        pos = self._blob.find(fragment)
+        if pos < 0:
+            return None
+        return bisect_right(self._offsets, pos) - 1
+
+    def find(self, fragment: str) -> Optional[Dict[str, Any]]:
+        index = self.position(fragment)
+        return None if index is None else self._stocks[index]
+
+_NAME_INDEX = _SubstringIndex(_NAMES)
+_KEYWORD_FRAGMENT_INDEX = _SubstringIndex(_KEYWORDS)
+
+# Single-pass matcher for "which keyword appears in this text"; each keyword maps
+# to (position in _KEYWORDS, stock) so the earliest-listed stock still wins
+_KEYWORD_AUTOMATON = None
+if ahocorasick is not None:
+    _KEYWORD_AUTOMATON = ahocorasick.Automaton()
+    for _i, (_kw, _stock) in enumerate(_KEYWORDS):
+        if _kw not in _KEYWORD_AUTOMATON:
+            _KEYWORD_AUTOMATON.add_word(_kw, (_i, _stock))
+    _KEYWORD_AUTOMATON.make_automaton()
+
+def _keyword_in_text_position(text: str) -> Optional[int]:
+    """Position in _KEYWORDS of the first keyword that occurs in text, or None"""
+    if _KEYWORD_AUTOMATON is not None:
+        return min((index for _, (index, _) in _KEYWORD_AUTOMATON.iter(text)), default=None)
+    return next((i for i, (keyword, _) in enumerate(_KEYWORDS) if keyword in text), None)
+
+def find_keyword_stock(text: str) -> Optional[Dict[str, Any]]:
+    """Return the first stock whose keyword occurs in text (text must be lowercase)"""
+    index = _keyword_in_text_position(text)
+    return None if index is None else _KEYWORDS[index][1]
+
 # Sample news articles
 SAMPLE_NEWS = [
     {
@@ -254,7 +513,86 @@ Analysts remain bullish on the sector, with most upgrading their target prices f
     }
 ]
 
-def get_real_stock_price(symbol, max_retries=3):
+# News articles grouped by lower-cased category for /api/news
+_NEWS_BY_CATEGORY = defaultdict(list)
+for _article in SAMPLE_NEWS:
+    _NEWS_BY_CATEGORY[_article.get('category', '').lower()].append(_article)
+
+def _store_expiring(cache: dict, key, entry: tuple, maxsize: int):
+    """Insert a (value, expiry_ts, ...) entry into a dict cache; call with its lock held.
+    Expired entries are dropped first, then the oldest ones while the cache is full."""
+    now = time.time()
+    for stale in [k for k, v in cache.items() if v[1] <= now]:
+        del cache[stale]
+    cache.pop(key, None)
+    while len(cache) >= maxsize:
+        cache.pop(next(iter(cache)))
+    cache[key] = entry
+
+# Short-lived quote cache: normalized symbol -> (price, expiry_ts, is_real)
+_price_cache: Dict[str, tuple] = {}
+_price_cache_lock = threading.Lock()
+PRICE_CACHE_TTL_OPEN = 10
+PRICE_CACHE_TTL_CLOSED = 60
+PRICE_CACHE_MAXSIZE = 1024
+
+# Symbols whose live sources all failed recently: ticker -> (True, retry_after_ts).
+# Guarded by _price_cache_lock.
+_fail_cache: Dict[str, tuple] = {}
+PRICE_FAIL_COOLDOWN = 30
+PRICE_FAIL_CACHE_MAXSIZE = 1024
+
+def get_real_stock_price(symbol, max_retries=2, force_refresh=False):
+    """Get real stock price, served from the quote cache while it is fresh"""
+    cache_key = normalize_stock_symbol(symbol)
+    if not force_refresh:
+        with _price_cache_lock:
+            cached = _price_cache.get(cache_key)
+        if cached and cached[1] > time.time():
+            return cached[0], cached[2]
+
+    price, is_real = _fetch_stock_price(symbol, max_retries)
+    ttl = PRICE_CACHE_TTL_OPEN if is_market_open() else PRICE_CACHE_TTL_CLOSED
+    with _price_cache_lock:
+        _store_expiring(_price_cache, cache_key, (price, time.time() + ttl, is_real), PRICE_CACHE_MAXSIZE)
+    return price, is_real
+
+def get_real_stock_prices_bulk(symbols: List[str]) -> Dict[str, tuple]:
+    """Quote several symbols at once as {symbol: (price, is_real)}; cached quotes are reused
+    and the rest come from one batched download"""
+    now = time.time()
+    prices = {}
+    missing = []
+    with _price_cache_lock:
+        for sym in dict.fromkeys(symbols):
+            cached = _price_cache.get(normalize_stock_symbol(sym))
+            if cached and cached[1] > now:
+                prices[sym] = (cached[0], cached[2])
+            else:
+                missing.append(sym)
+    if not missing:
+        return prices
+
+    tickers = [normalize_stock_symbol(s) for s in missing]
+    try:
+        df = yf.download(tickers, period="1d", group_by='ticker', threads=True, progress=False)
+    except Exception as e:
+        logger.warning(f"Batched price download failed: {e}")
+        df = None
+    expires = now + (PRICE_CACHE_TTL_OPEN if is_market_open() else PRICE_CACHE_TTL_CLOSED)
+    for sym, ticker in zip(missing, tickers):
+        try:
+            price = float(df[ticker]['Close'].dropna().iloc[-1])
+        except Exception:
+            # Not in the batch; the single-symbol path has its own fallbacks
+            prices[sym] = get_real_stock_price(sym)
+            continue
+        with _price_cache_lock:
+            _store_expiring(_price_cache, ticker, (price, expires, True), PRICE_CACHE_MAXSIZE)
+        prices[sym] = (price, True)
+    return prices
+
+def _fetch_stock_price(symbol, max_retries=2):
     """Get real stock price with enhanced error handling"""
     try:
         # Normalize to NSE ticker for Indian symbols
@@ -262,6 +600,12 @@ def get_real_stock_price(symbol, max_retries=3):
         if '.' not in symbol:
             symbol = f"{symbol}.NS"
 
+        # Skip straight to the fallback while a recent failure is cooling down
+        with _price_cache_lock:
+            failed = _fail_cache.get(symbol)
+        if failed and failed[1] > time.time():
+            return generate_realistic_price(symbol), False
+
         # 1) Prefer DataFetcher (Finnhub/fast_info) for live price
         try:
             price = data_fetcher.get_real_time_price(raw_symbol)
@@ -282,72 +626,117 @@ def get_real_stock_price(symbol, max_retries=3):
             except Exception as e:
                 logger.warning(f"YFinance intraday attempt {attempt + 1} failed for {symbol}: {e}")
                 if attempt < max_retries - 1:
-                    sleep(1)
+                    sleep(0.2 * (2 ** attempt))
 
         # Fallback to realistic simulation
         logger.warning(f"All real data sources failed for {symbol}, using fallback")
+        with _price_cache_lock:
+            _store_expiring(_fail_cache, symbol, (True, time.time() + PRICE_FAIL_COOLDOWN),
+                            PRICE_FAIL_CACHE_MAXSIZE)
         return generate_realistic_price(symbol), False
     
     except Exception as e:
         logger.error(f"Error in get_real_stock_price for {symbol}: {e}")
         return generate_realistic_price(symbol), False
 
+# Typical trading ranges used when no live quote is available
+_PRICE_RANGES = {
+    'TCS': (3000, 4000),
+    'INFY': (1400, 1800),
+    'HDFCBANK': (1400, 1700),
+    'RELIANCE': (2200, 2800),
+    'ICICIBANK': (900, 1200),
+    'SBIN': (600, 800),
+    'ITC': (400, 500),
+    'WIPRO': (400, 600),
+    'LT': (2800, 3500),
+    'BHARTIARTL': (800, 1100),
+    'ASIANPAINT': (3000, 3800),
+    'MARUTI': (9000, 12000),
+    'KOTAKBANK': (1600, 2000),
+    'AXISBANK': (1000, 1300),
+    'NESTLEIND': (20000, 25000),
+    'HINDUNILVR': (2300, 2800),
+    'BAJFINANCE': (6000, 8000),
+    'ADANIPORTS': (700, 1000),
+    'NTPC': (250, 350),
+    'ONGC': (180, 250),
+    'TATAMOTORS': (700, 1000),
+    'TATASTEEL': (110, 160),
+    'JSWSTEEL': (700, 900),
+    'HINDALCO': (400, 550),
+    'VEDL': (350, 500),
+    'ADANIENT': (2000, 3000),
+    'SAIL': (80, 120),
+    'YESBANK': (15, 25),
+    'SUZLON': (40, 60),
+}
+
 def generate_realistic_price(symbol):
     """Generate realistic stock prices based on actual ranges"""
-    price_ranges = {
-        'TCS': (3000, 4000),
-        'INFY': (1400, 1800),
-        'HDFCBANK': (1400, 1700),
-        'RELIANCE': (2200, 2800),
-        'ICICIBANK': (900, 1200),
-        'SBIN': (600, 800),
-        'ITC': (400, 500),
-        'WIPRO': (400, 600),
-        'LT': (2800, 3500),
-        'BHARTIARTL': (800, 1100),
-        'ASIANPAINT': (3000, 3800),
-        'MARUTI': (9000, 12000),
-        'KOTAKBANK': (1600, 2000),
-        'AXISBANK': (1000, 1300),
-        'NESTLEIND': (20000, 25000),
-        'HINDUNILVR': (2300, 2800),
-        'BAJFINANCE': (6000, 8000),
-        'ADANIPORTS': (700, 1000),
-        'NTPC': (250, 350),
-        'ONGC': (180, 250),
-        'TATAMOTORS': (700, 1000),
-        'TATASTEEL': (110, 160),
-        'JSWSTEEL': (700, 900),
-        'HINDALCO': (400, 550),
-        'VEDL': (350, 500),
-        'ADANIENT': (2000, 3000),
-        'SAIL': (80, 120),
-        'YESBANK': (15, 25),
-        'SUZLON': (40, 60),
-    }
-    
-    price_range = price_ranges.get(symbol.replace('.NS', ''), (100, 1000))
+    price_range = _PRICE_RANGES.get(symbol.partition('.')[0], (100, 1000))
     base_price = random.uniform(price_range[0], price_range[1])
     daily_change = random.uniform(-0.03, 0.03)
     return round(base_price * (1 + daily_change), 2)
 
+# Downloaded price history keyed by (ticker, period): (DataFrame, expiry_ts).
+# Kept in least-recently-used order, so eviction drops the first entry.
+_ohlc_cache: Dict[tuple, tuple] = {}
+_ohlc_cache_lock = threading.Lock()
+OHLC_CACHE_TTL = config.DATA_CACHE_DURATION.total_seconds()
+OHLC_CACHE_MAXSIZE = 256
+
 def get_ohlc_data(symbol, period="3mo"):
     """Get OHLC data for technical analysis"""
     try:
         if '.' not in symbol:
             symbol = f"{symbol}.NS"
+        
+        key = (symbol, period)
+        with _ohlc_cache_lock:
+            cached = _ohlc_cache.pop(key, None)
+            if cached:
+                _ohlc_cache[key] = cached
+        if cached and cached[1] > time.time():
+            # Callers add indicator columns, so each gets its own copy
+            return cached[0].copy()
             
         ticker = yf.Ticker(symbol)
         hist = ticker.history(period=period)
         
         if not hist.empty and len(hist) > 10:
-            return hist
+            with _ohlc_cache_lock:
+                if len(_ohlc_cache) >= OHLC_CACHE_MAXSIZE:
+                    # Drop the least recently used entry
+                    _ohlc_cache.pop(next(iter(_ohlc_cache)))
+                _ohlc_cache[key] = (hist, time.time() + OHLC_CACHE_TTL)
+            return hist.copy()
         else:
             return generate_sample_ohlc_data(symbol, period)
     except Exception as e:
         logger.error(f"Error getting OHLC data for {symbol}: {e}")
         return generate_sample_ohlc_data(symbol, period)
 
+def ohlc_cache_expiry(symbol, period):
+    """Expiry timestamp of the cached history for symbol/period, or None
+    if get_ohlc_data is currently serving sample data for it"""
+    if '.' not in symbol:
+        symbol = f"{symbol}.NS"
+    with _ohlc_cache_lock:
+        cached = _ohlc_cache.get((symbol, period))
+    return cached[1] if cached else None
+
+@lru_cache(maxsize=1024)
+def get_yahoo_stock_name(symbol):
+    """Company name from Yahoo's quote info; names don't change, so each symbol is
+    looked up once per process (failures raise and are not cached)"""
+    info = yf.Ticker(f"{symbol}.NS").info
+    return info.get('longName', f"{symbol} Ltd")
+
+# Shared generator for sample data and the cosmetic noise in prediction series;
+# one vectorised draw per series instead of a random.uniform call per point
+_chart_rng = np.random.default_rng()
+
 def generate_sample_ohlc_data(symbol, period='3mo'):
     """Generate sample OHLC data when real data is not available"""
     days_map = {'1mo': 30, '3mo': 90, '6mo': 180, '1y': 365}
@@ -355,105 +744,134 @@ def generate_sample_ohlc_data(symbol, period='3mo'):
     
     dates = pd.date_range(end=datetime.now(), periods=days, freq='D')
     base_price = generate_realistic_price(symbol)
-    data = []
     
-    for i, date in enumerate(dates):
-        if i == 0:
-            open_price = base_price
-        else:
-            open_price = data[i-1]['Close']
-        
-        daily_change = random.uniform(-0.05, 0.05)
-        close_price = open_price * (1 + daily_change)
-        
-        volatility = random.uniform(0.01, 0.03)
-        high_price = max(open_price, close_price) * (1 + volatility)
-        low_price = min(open_price, close_price) * (1 - volatility)
-        
-        volume = random.randint(100000, 1000000)
-        
-        data.append({
-            'Open': round(open_price, 2),
-            'High': round(high_price, 2),
-            'Low': round(low_price, 2),
-            'Close': round(close_price, 2),
-            'Volume': volume
-        })
+    # Random walk: each day opens at the previous close
+    closes = base_price * np.cumprod(1 + _chart_rng.uniform(-0.05, 0.05, days))
+    opens = np.concatenate(([base_price], closes[:-1]))
     
-    df = pd.DataFrame(data, index=dates)
+    volatility = _chart_rng.uniform(0.01, 0.03, days)
+    highs = np.maximum(opens, closes) * (1 + volatility)
+    lows = np.minimum(opens, closes) * (1 - volatility)
+    
+    volumes = _chart_rng.integers(100000, 1000001, days)
+    
+    df = pd.DataFrame({
+        'Open': opens,
+        'High': highs,
+        'Low': lows,
+        'Close': closes,
+        'Volume': volumes
+    }, index=dates).round(2)
     return df
 
 def search_stock_by_input(user_input):
     """Enhanced stock search"""
     try:
         user_input = user_input.lower().strip()
-        all_stocks = []
-        
-        for category, stocks in COMPREHENSIVE_STOCKS.items():
-            all_stocks.extend(stocks)
         
         # Exact symbol match
-        for stock in all_stocks:
-            if stock['symbol'].lower() == user_input:
-                return stock
+        stock = _BY_SYMBOL.get(user_input)
+        if stock:
+            return stock
         
         # Name contains input
-        for stock in all_stocks:
-            if user_input in stock['name'].lower():
-                return stock
-        
-        # Keywords match
-        for stock in all_stocks:
-            for keyword in stock['keywords']:
-                if user_input in keyword or keyword in user_input:
-                    return stock
-        
-        return None
+        stock = _NAME_INDEX.find(user_input)
+        if stock:
+            return stock
+        
+        # Keywords match, in either direction; the earliest-listed keyword wins,
+        # as it would in a single scan of the list
+        hits = [index for index in (_keyword_in_text_position(user_input),
+                                    _KEYWORD_FRAGMENT_INDEX.position(user_input))
+                if index is not None]
+        return _KEYWORDS[min(hits)][1] if hits else None
     except Exception as e:
         logger.error(f"Error in stock search: {e}")
         return None
 
+_NO_ONLINE_ANSWER = "I couldn't find specific information online for your question. Could you please rephrase or ask about stock market, investments, or trading topics that I can help with?"
+
+# DuckDuckGo answers keyed by normalized question: question -> (answer, expiry_ts)
+_ddg_cache: Dict[str, tuple] = {}
+_ddg_cache_lock = threading.Lock()
+DDG_CACHE_TTL = 3600
+DDG_CACHE_MAXSIZE = 512
+
+def _ddg_fetch(question: str) -> Optional[str]:
+    """Query the DuckDuckGo Instant Answer API; returns '' when it has no answer and None on a non-200"""
+    # Use DuckDuckGo Instant Answer API (free, no API key required)
+    url = "https://api.duckduckgo.com/"
+    params = {
+        'q': question,
+        'format': 'json',
+        'no_html': '1',
+        'skip_disambig': '1'
+    }
+    
+    response = HTTP.get(url, params=params, timeout=10)
+    if response.status_code != 200:
+        return None
+    data = response.json()
+    
+    # Try to get answer from different fields
+    answer = ""
+    
+    if data.get('Abstract'):
+        answer = data['Abstract']
+    elif data.get('Definition'):
+        answer = data['Definition']
+    elif data.get('Answer'):
+        answer = data['Answer']
+    elif data.get('RelatedTopics') and len(data['RelatedTopics']) > 0:
+        if 'Text' in data['RelatedTopics'][0]:
+            answer = data['RelatedTopics'][0]['Text']
+    
+    return answer
+
 def search_online_for_answer(question):
     """Search online for answers using DuckDuckGo Instant Answer API"""
     try:
-        # Use DuckDuckGo Instant Answer API (free, no API key required)
-        url = "https://api.duckduckgo.com/"
-        params = {
-            'q': question,
-            'format': 'json',
-            'no_html': '1',
-            'skip_disambig': '1'
-        }
+        key = question.lower().strip()
+        with _ddg_cache_lock:
+            cached = _ddg_cache.get(key)
+        if cached and cached[1] > time.time():
+            answer = cached[0]
+        else:
+            answer = _ddg_fetch(question)
+            if answer is not None:
+                with _ddg_cache_lock:
+                    if len(_ddg_cache) >= DDG_CACHE_MAXSIZE:
+                        # Drop the oldest entry (dicts keep insertion order)
+                        _ddg_cache.pop(next(iter(_ddg_cache)))
+                    _ddg_cache[key] = (answer, time.time() + DDG_CACHE_TTL)
         
-        response = requests.get(url, params=params, timeout=10)
-        if response.status_code == 200:
-            data = response.json()
-            
-            # Try to get answer from different fields
-            answer = ""
-            
-            if data.get('Abstract'):
-                answer = data['Abstract']
-            elif data.get('Definition'):
-                answer = data['Definition']
-            elif data.get('Answer'):
-                answer = data['Answer']
-            elif data.get('RelatedTopics') and len(data['RelatedTopics']) > 0:
-                if 'Text' in data['RelatedTopics'][0]:
-                    answer = data['RelatedTopics'][0]['Text']
-            
-            if answer:
-                return f"Based on my search: {answer}"
+        if answer:
+            return f"Based on my search: {answer}"
         
         # Fallback to a more targeted search for financial questions
         if any(word in question.lower() for word in ['stock', 'invest', 'market', 'finance', 'trading']):
             return get_financial_answer(question)
         
-        return "I couldn't find specific information online for your question. Could you please rephrase or ask about stock market, investments, or trading topics that I can help with?"
+        return _NO_ONLINE_ANSWER
     except Exception as e:
         logger.error(f"Error in online search: {e}")
         return get_financial_answer(question)
 
+# Static system messages for the LLM backends, shared by every request
+_PERPLEXITY_SYSTEM_MSG = {
+    'role': 'system',
+    'content': 'You are an expert investment assistant. Answer concisely with accurate finance knowledge. Cite sources briefly when relevant.'
+}
+_OPENROUTER_SYSTEM_MSG = {
+    'role': 'system',
+    'content': (
+        "You are a helpful, professional trading assistant for a stock prediction and portfolio platform. "
+        "Answer concisely, in the user's language. If the user asks about the website's features, base answers on these endpoints: "
+        "/api/predict, /api/technical-chart/{symbol}, /api/portfolio/*, /api/news, /api/top-stocks, /api/market-indices. "
+        "When relevant, explain RSI, MACD, Bollinger Bands briefly. Avoid financial advice disclaimers beyond brief common-sense caution."
+    )
+}
+
 def ask_perplexity(question: str) -> Optional[str]:
     """Query Perplexity API if available."""
     try:
@@ -466,11 +884,11 @@ def ask_perplexity(question: str) -> Optional[str]:
         payload = {
             'model': config.PERPLEXITY_MODEL,
             'messages': [
-                { 'role': 'system', 'content': 'You are an expert investment assistant. Answer concisely with accurate finance knowledge. Cite sources briefly when relevant.' },
+                _PERPLEXITY_SYSTEM_MSG,
                 { 'role': 'user', 'content': question }
             ]
         }
-        resp = requests.post('https://api.perplexity.ai/chat/completions', headers=headers, json=payload, timeout=20)
+        resp = HTTP.post('https://api.perplexity.ai/chat/completions', headers=headers, json=payload, timeout=20)
         if resp.status_code == 200:
             data = resp.json()
             choices = data.get('choices') or []
@@ -493,14 +911,8 @@ def ask_openrouter_grok(question: str, language_hint: Optional[str] = 'en') -> O
             'X-Title': 'Stock Market Predictor',
             'Content-Type': 'application/json'
         }
-        system_prompt = (
-            "You are a helpful, professional trading assistant for a stock prediction and portfolio platform. "
-            "Answer concisely, in the user's language. If the user asks about the website's features, base answers on these endpoints: "
-            "/api/predict, /api/technical-chart/{symbol}, /api/portfolio/*, /api/news, /api/top-stocks, /api/market-indices. "
-            "When relevant, explain RSI, MACD, Bollinger Bands briefly. Avoid financial advice disclaimers beyond brief common-sense caution."
-        )
         messages = [
-            { 'role': 'system', 'content': system_prompt },
+            _OPENROUTER_SYSTEM_MSG,
             { 'role': 'user', 'content': question }
         ]
         payload = {
@@ -511,7 +923,7 @@ def ask_openrouter_grok(question: str, language_hint: Optional[str] = 'en') -> O
             'top_p': 0.9
         }
         url = f"{config.OPENROUTER_BASE_URL}/chat/completions"
-        resp = requests.post(url, headers=headers, json=payload, timeout=20)
+        resp = HTTP.post(url, headers=headers, json=payload, timeout=20)
         if resp.status_code == 200:
             data = resp.json()
             choices = data.get('choices') or []
@@ -523,12 +935,18 @@ def ask_openrouter_grok(question: str, language_hint: Optional[str] = 'en') -> O
         logger.error(f"OpenRouter API error: {e}")
     return None
 
-def get_financial_answer(question):
-    """Provide financial and investment answers"""
-    question_lower = question.lower()
-    
-    if any(word in question_lower for word in ['rsi', 'relative strength']):
-        return """**RSI (Relative Strength Index)** is a momentum oscillator that measures the speed and change of price movements. Here's what you need to know:
+# Topic keywords for get_financial_answer, matched in a single regex pass. Groups are
+# listed in priority order: when several topics appear, the lowest-numbered group wins
+FINANCIAL_TOPIC_PATTERN = re.compile(
+    r'(?P<rsi>\brsi\b|relative strength)'
+    r'|(?P<macd>macd)'
+    r'|(?P<bollinger>bollinger)'
+    r'|(?P<sr>support|resistance)'
+    r'|(?P<div>diversif)',
+    re.IGNORECASE
+)
+
+_RSI_ANSWER = """**RSI (Relative Strength Index)** is a momentum oscillator that measures the speed and change of price movements. Here's what you need to know:
 
 **Key Points:**
 • RSI ranges from 0 to 100
@@ -545,8 +963,7 @@ def get_financial_answer(question):
 **Calculation:** RSI = 100 - (100 / (1 + RS))
 Where RS = Average Gain / Average Loss over 14 periods"""
 
-    elif any(word in question_lower for word in ['macd']):
-        return """**MACD (Moving Average Convergence Divergence)** is a trend-following momentum indicator:
+_MACD_ANSWER = """**MACD (Moving Average Convergence Divergence)** is a trend-following momentum indicator:
 
 **Components:**
 • MACD Line: 12-day EMA - 26-day EMA
@@ -565,8 +982,7 @@ Where RS = Average Gain / Average Loss over 14 periods"""
 • Look for histogram convergence/divergence
 • Avoid in sideways markets"""
 
-    elif any(word in question_lower for word in ['bollinger bands', 'bollinger']):
-        return """**Bollinger Bands** consist of three lines that help identify overbought and oversold conditions:
+_BOLLINGER_ANSWER = """**Bollinger Bands** consist of three lines that help identify overbought and oversold conditions:
 
 **Components:**
 • Middle Band: 20-period simple moving average
@@ -585,8 +1001,7 @@ Where RS = Average Gain / Average Loss over 14 periods"""
 • Great for identifying volatility cycles
 • Works well in ranging markets"""
 
-    elif any(word in question_lower for word in ['support', 'resistance']):
-        return """**Support and Resistance** are key technical analysis concepts:
+_SUPPORT_RESISTANCE_ANSWER = """**Support and Resistance** are key technical analysis concepts:
 
 **Support Level:**
 • Price level where buying interest emerges
@@ -611,8 +1026,7 @@ Where RS = Average Gain / Average Loss over 14 periods"""
 • Round numbers often act as psychological levels
 • Use trend lines to identify dynamic S/R"""
 
-    elif any(word in question_lower for word in ['diversification', 'diversify']):
-        return """**Portfolio Diversification** is a risk management strategy:
+_DIVERSIFICATION_ANSWER = """**Portfolio Diversification** is a risk management strategy:
 
 **Why Diversify:**
 • Reduces overall portfolio risk
@@ -640,8 +1054,15 @@ Where RS = Average Gain / Average Loss over 14 periods"""
 • Consider correlation between holdings
 • Include defensive stocks"""
 
-    else:
-        return f"""I can help you with stock market and investment questions! Here are some topics I can assist with:
+FINANCIAL_ANSWERS = {
+    'rsi': _RSI_ANSWER,
+    'macd': _MACD_ANSWER,
+    'bollinger': _BOLLINGER_ANSWER,
+    'sr': _SUPPORT_RESISTANCE_ANSWER,
+    'div': _DIVERSIFICATION_ANSWER
+}
+
+DEFAULT_FINANCIAL_ANSWER = """I can help you with stock market and investment questions! Here are some topics I can assist with:
 
 **Technical Analysis:**
 • RSI, MACD, Bollinger Bands
@@ -663,6 +1084,16 @@ Where RS = Average Gain / Average Loss over 14 periods"""
 
 Feel free to ask specific questions about any of these topics!"""
 
+def get_financial_answer(question):
+    """Provide financial and investment answers"""
+    match = min(FINANCIAL_TOPIC_PATTERN.finditer(question), key=lambda m: m.lastindex, default=None)
+    if match:
+        return FINANCIAL_ANSWERS[match.lastgroup]
+    return DEFAULT_FINANCIAL_ANSWER
+
+# Shared across requests so quote lookups for many symbols overlap
+_prices_pool = concurrent.futures.ThreadPoolExecutor(max_workers=16)
+
 @app.route('/api/real-time-prices')
 def real_time_prices():
     try:
@@ -671,14 +1102,19 @@ def real_time_prices():
             return jsonify({'error': 'symbols query param required'}), 400
         symbols = [s.strip().upper() for s in symbols_param.split(',') if s.strip()]
         prices: Dict[str, float] = {}
-        for sym in symbols:
-            price = data_fetcher.get_real_time_price(sym)
+        futures = {sym: _prices_pool.submit(data_fetcher.get_real_time_price, sym) for sym in symbols}
+        for sym, future in futures.items():
+            try:
+                price = future.result(timeout=5)
+            except Exception as e:
+                logger.warning(f"Real-time price lookup failed for {sym}: {e}")
+                continue
             if price is not None:
                 prices[sym] = float(price)
         return jsonify({
             'prices': prices,
             'market_open': is_market_open(),
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
+            'timestamp': now_iso()
         })
     except Exception as e:
         logger.error(f"Real-time prices error: {e}")
@@ -691,57 +1127,69 @@ def internal_error(error):
 
 # ---------------- Paper Trading APIs ----------------
 def get_or_create_account(user_id: int) -> Dict[str, Any]:
-    conn = sqlite3.connect('stock_app.db')
-    c = conn.cursor()
-    c.execute('SELECT cash, equity FROM accounts WHERE user_id = ?', (user_id,))
-    row = c.fetchone()
-    if not row:
-        c.execute('INSERT INTO accounts (user_id, cash, equity) VALUES (?, ?, ?)', (user_id, 100000.0, 0.0))
-        conn.commit()
-        cash, equity = 100000.0, 0.0
-    else:
-        cash, equity = float(row[0]), float(row[1])
-    conn.close()
+    with db() as conn:
+        c = conn.cursor()
+        c.execute('SELECT cash, equity FROM accounts WHERE user_id = ?', (user_id,))
+        row = c.fetchone()
+        if not row:
+            c.execute('INSERT INTO accounts (user_id, cash, equity) VALUES (?, ?, ?)', (user_id, 100000.0, 0.0))
+            conn.commit()
+            cash, equity = 100000.0, 0.0
+        else:
+            cash, equity = float(row[0]), float(row[1])
     return {'cash': cash, 'equity': equity}
 
-def update_account_equity(user_id: int):
+def update_account_equity(user_id: int) -> Optional[Dict[str, Any]]:
+    """Reprice open positions and return the refreshed account, or None if there is no account"""
     try:
-        conn = sqlite3.connect('stock_app.db')
-        c = conn.cursor()
-        # sum of market value of positions
-        c.execute('SELECT symbol, quantity, avg_price FROM positions WHERE user_id = ?', (user_id,))
-        positions = c.fetchall()
-        equity = 0.0
-        for sym, qty, _ in positions:
-            price, _ = get_real_stock_price(sym)
-            equity += float(price) * int(qty)
-        c.execute('UPDATE accounts SET equity = ?, created_at = created_at WHERE user_id = ?', (equity, user_id))
-        conn.commit()
-        conn.close()
+        with db() as conn:
+            c = conn.cursor()
+            # Read cash and positions from one snapshot
+            c.execute('BEGIN')
+            c.execute('SELECT cash FROM accounts WHERE user_id = ?', (user_id,))
+            row = c.fetchone()
+            if row:
+                # sum of market value of positions
+                c.execute('SELECT symbol, quantity, avg_price FROM positions WHERE user_id = ?', (user_id,))
+                positions = c.fetchall()
+            conn.commit()
+        if not row:
+            return None
+        cash = float(row[0])
+        # One batched quote for every held symbol instead of one round-trip per position
+        prices = get_real_stock_prices_bulk([sym for sym, _, _ in positions])
+        equity = sum((prices[sym][0] * int(qty) for sym, qty, _ in positions), 0.0)
+        # The connection (and any write lock) is not held across the price download
+        with db() as conn:
+            conn.execute('UPDATE accounts SET equity = ? WHERE user_id = ? AND equity IS NOT ?',
+                         (equity, user_id, equity))
+            conn.commit()
+        return {'cash': cash, 'equity': equity}
     except Exception as e:
         logger.warning(f"Failed updating equity: {e}")
+        return None
 
 @app.route('/api/trading/account')
 def trading_account():
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
-    acct = get_or_create_account(session['user_id'])
-    update_account_equity(session['user_id'])
-    acct = get_or_create_account(session['user_id'])
+    acct = update_account_equity(session['user_id'])
+    if acct is None:
+        acct = get_or_create_account(session['user_id'])
     return jsonify(acct)
 
 @app.route('/api/trading/positions')
 def trading_positions():
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
-    conn = sqlite3.connect('stock_app.db')
-    c = conn.cursor()
-    c.execute('SELECT symbol, quantity, avg_price FROM positions WHERE user_id = ?', (session['user_id'],))
-    rows = c.fetchall()
-    conn.close()
+    with get_conn() as conn:
+        c = conn.cursor()
+        c.execute('SELECT symbol, quantity, avg_price FROM positions WHERE user_id = ?', (session['user_id'],))
+        rows = c.fetchall()
+    prices = get_real_stock_prices_bulk([r[0] for r in rows])
     positions = []
     for sym, qty, avgp in rows:
-        price, _ = get_real_stock_price(sym)
+        price, _ = prices[sym]
         positions.append({
             'symbol': sym,
             'quantity': int(qty),
@@ -756,77 +1204,68 @@ def trading_orders():
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
     if request.method == 'GET':
-        conn = sqlite3.connect('stock_app.db')
-        c = conn.cursor()
-        c.execute('SELECT id, symbol, side, quantity, order_type, status, filled_quantity, avg_fill_price, created_at FROM orders WHERE user_id = ? ORDER BY id DESC', (session['user_id'],))
-        rows = c.fetchall()
-        conn.close()
-        orders = []
-        for r in rows:
-            orders.append({
-                'id': r[0], 'symbol': r[1], 'side': r[2], 'quantity': r[3], 'order_type': r[4], 'status': r[5],
-                'filled_quantity': r[6], 'avg_fill_price': r[7], 'created_at': r[8]
-            })
+        with get_conn() as conn:
+            c = conn.cursor()
+            c.execute('SELECT id, symbol, side, quantity, order_type, status, filled_quantity, avg_fill_price, created_at FROM orders WHERE user_id = ? ORDER BY id DESC', (session['user_id'],))
+            orders = [dict(r) for r in c.fetchall()]
         return jsonify({'orders': orders})
     else:
         data = request.get_json() or {}
-        symbol = (data.get('symbol') or '').upper().replace('.NS', '')
+        symbol = strip_exchange_suffix(data.get('symbol') or '')
         side = (data.get('side') or '').upper()
         qty = int(data.get('quantity') or 0)
         if not symbol or side not in ['BUY', 'SELL'] or qty <= 0:
             return jsonify({'error': 'Invalid order params'}), 400
 
-        # Risk checks: max position size 30% of cash; prevent shorting
-        acct = get_or_create_account(session['user_id'])
+        # Price outside the transaction so the write lock is never held across a network call
+        get_or_create_account(session['user_id'])
         price, _ = get_real_stock_price(symbol)
         notional = float(price) * qty
-        max_order = acct['cash'] * 0.3
-        if side == 'BUY' and notional > max_order:
-            return jsonify({'error': 'Order exceeds 30% cash risk limit'}), 400
-        if side == 'SELL':
-            # Ensure sufficient quantity
-            conn = sqlite3.connect('stock_app.db')
-            c = conn.cursor()
-            c.execute('SELECT quantity FROM positions WHERE user_id = ? AND symbol = ?', (session['user_id'], symbol))
-            row = c.fetchone()
-            have = int(row[0]) if row else 0
-            conn.close()
-            if qty > have:
-                return jsonify({'error': 'Insufficient position to sell'}), 400
 
-        # Execute as instant fill (paper)
-        conn = sqlite3.connect('stock_app.db')
-        c = conn.cursor()
-        c.execute('INSERT INTO orders (user_id, symbol, side, quantity, order_type, status, filled_quantity, avg_fill_price) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
-                  (session['user_id'], symbol, side, qty, 'MARKET', 'FILLED', qty, price))
-        # Update cash and positions
-        if side == 'BUY':
-            new_cash = acct['cash'] - notional
-            c.execute('UPDATE accounts SET cash = ? WHERE user_id = ?', (new_cash, session['user_id']))
-            # upsert position
-            c.execute('SELECT quantity, avg_price FROM positions WHERE user_id = ? AND symbol = ?', (session['user_id'], symbol))
-            row = c.fetchone()
-            if row:
-                old_qty, old_avg = int(row[0]), float(row[1])
-                new_qty = old_qty + qty
-                new_avg = ((old_qty * old_avg) + (qty * price)) / new_qty
-                c.execute('UPDATE positions SET quantity = ?, avg_price = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ? AND symbol = ?', (new_qty, new_avg, session['user_id'], symbol))
-            else:
-                c.execute('INSERT INTO positions (user_id, symbol, quantity, avg_price) VALUES (?, ?, ?, ?)', (session['user_id'], symbol, qty, price))
-        else: # SELL
-            new_cash = acct['cash'] + notional
-            c.execute('UPDATE accounts SET cash = ? WHERE user_id = ?', (new_cash, session['user_id']))
+        # Execute as instant fill (paper): checks and writes share one IMMEDIATE transaction,
+        # so the cash and position they read cannot change before the fill is written
+        with get_conn() as conn:
+            c = conn.cursor()
+            c.execute('BEGIN IMMEDIATE')
+            c.execute('SELECT cash FROM accounts WHERE user_id = ?', (session['user_id'],))
+            cash = float(c.fetchone()[0])
             c.execute('SELECT quantity, avg_price FROM positions WHERE user_id = ? AND symbol = ?', (session['user_id'], symbol))
             row = c.fetchone()
-            if row:
-                old_qty, old_avg = int(row[0]), float(row[1])
-                new_qty = max(0, old_qty - qty)
-                if new_qty == 0:
-                    c.execute('DELETE FROM positions WHERE user_id = ? AND symbol = ?', (session['user_id'], symbol))
+
+            # Risk checks: max position size 30% of cash; prevent shorting
+            max_order = cash * 0.3
+            if side == 'BUY' and notional > max_order:
+                return jsonify({'error': 'Order exceeds 30% cash risk limit'}), 400
+            if side == 'SELL':
+                # Ensure sufficient quantity
+                have = int(row[0]) if row else 0
+                if qty > have:
+                    return jsonify({'error': 'Insufficient position to sell'}), 400
+
+            c.execute('INSERT INTO orders (user_id, symbol, side, quantity, order_type, status, filled_quantity, avg_fill_price) VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                      (session['user_id'], symbol, side, qty, 'MARKET', 'FILLED', qty, price))
+            # Update cash and positions
+            if side == 'BUY':
+                new_cash = cash - notional
+                c.execute('UPDATE accounts SET cash = ? WHERE user_id = ?', (new_cash, session['user_id']))
+                # upsert position
+                if row:
+                    old_qty, old_avg = int(row[0]), float(row[1])
+                    new_qty = old_qty + qty
+                    new_avg = ((old_qty * old_avg) + (qty * price)) / new_qty
+                    c.execute('UPDATE positions SET quantity = ?, avg_price = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ? AND symbol = ?', (new_qty, new_avg, session['user_id'], symbol))
                 else:
-                    c.execute('UPDATE positions SET quantity = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ? AND symbol = ?', (new_qty, session['user_id'], symbol))
-        conn.commit()
-        conn.close()
+                    c.execute('INSERT INTO positions (user_id, symbol, quantity, avg_price) VALUES (?, ?, ?, ?)', (session['user_id'], symbol, qty, price))
+            else: # SELL
+                new_cash = cash + notional
+                c.execute('UPDATE accounts SET cash = ? WHERE user_id = ?', (new_cash, session['user_id']))
+                if row:
+                    old_qty, old_avg = int(row[0]), float(row[1])
+                    new_qty = max(0, old_qty - qty)
+                    if new_qty == 0:
+                        c.execute('DELETE FROM positions WHERE user_id = ? AND symbol = ?', (session['user_id'], symbol))
+                    else:
+                        c.execute('UPDATE positions SET quantity = ?, updated_at = CURRENT_TIMESTAMP WHERE user_id = ? AND symbol = ?', (new_qty, session['user_id'], symbol))
         update_account_equity(session['user_id'])
         return jsonify({'success': True, 'message': 'Order filled', 'fill_price': round(price, 2)})
 
@@ -835,35 +1274,41 @@ def trading_alerts():
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
     if request.method == 'GET':
-        conn = sqlite3.connect('stock_app.db')
-        c = conn.cursor()
-        c.execute('SELECT id, symbol, condition, note, created_at FROM alerts WHERE user_id = ? ORDER BY id DESC', (session['user_id'],))
-        rows = c.fetchall()
-        conn.close()
-        alerts = [{'id': r[0], 'symbol': r[1], 'condition': r[2], 'note': r[3], 'created_at': r[4]} for r in rows]
+        with get_conn() as conn:
+            c = conn.cursor()
+            c.execute('SELECT id, symbol, condition, note, created_at FROM alerts WHERE user_id = ? ORDER BY id DESC', (session['user_id'],))
+            alerts = [dict(r) for r in c.fetchall()]
         return jsonify({'alerts': alerts})
     elif request.method == 'POST':
         data = request.get_json() or {}
-        symbol = (data.get('symbol') or '').upper().replace('.NS', '')
-        condition = (data.get('condition') or '').strip()
-        note = (data.get('note') or '').strip()
-        if not symbol or not condition:
+        # Either a single alert or several as {"items": [...]}
+        items = data.get('items') if isinstance(data, dict) and isinstance(data.get('items'), list) else [data]
+        rows = []
+        for item in items:
+            if not isinstance(item, dict):
+                return jsonify({'error': 'symbol and condition required'}), 400
+            symbol = strip_exchange_suffix(item.get('symbol') or '')
+            condition = (item.get('condition') or '').strip()
+            note = (item.get('note') or '').strip()
+            if not symbol or not condition:
+                return jsonify({'error': 'symbol and condition required'}), 400
+            op_code, threshold = parse_alert_condition(condition) or (None, None)
+            rows.append((session['user_id'], symbol, condition, note, op_code, threshold))
+        if not rows:
             return jsonify({'error': 'symbol and condition required'}), 400
-        conn = sqlite3.connect('stock_app.db')
-        c = conn.cursor()
-        c.execute('INSERT INTO alerts (user_id, symbol, condition, note) VALUES (?, ?, ?, ?)', (session['user_id'], symbol, condition, note))
-        conn.commit()
-        conn.close()
-        return jsonify({'success': True})
+        with get_conn() as conn:
+            conn.executemany('INSERT INTO alerts (user_id, symbol, condition, note, op_code, threshold) VALUES (?, ?, ?, ?, ?, ?)', rows)
+        invalidate_alert_cache()
+        return jsonify({'success': True, 'count': len(rows)})
     else: # DELETE
         alert_id = request.args.get('id')
         if not alert_id:
             return jsonify({'error': 'id required'}), 400
-        conn = sqlite3.connect('stock_app.db')
-        c = conn.cursor()
-        c.execute('DELETE FROM alerts WHERE id = ? AND user_id = ?', (alert_id, session['user_id']))
-        conn.commit()
-        conn.close()
+        with get_conn() as conn:
+            conn.execute('DELETE FROM alerts WHERE id = ? AND user_id = ?', (alert_id, session['user_id']))
+            # The alert's notification goes with it
+            conn.execute('DELETE FROM notifications WHERE alert_id = ? AND user_id = ?', (alert_id, session['user_id']))
+        invalidate_alert_cache()
         return jsonify({'success': True})
 
 @app.route('/')
@@ -886,6 +1331,36 @@ def portfolio():
 def news():
     return render_template('news.html')
 
+# Password hashing: argon2 (native code) when available. Hashes made by werkzeug
+# before the switch still verify and are upgraded on the next successful login.
+password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=2) if PasswordHasher else None
+
+# Hashing is CPU- and memory-heavy, so at most one hash per core runs at a time;
+# a login burst queues here instead of oversubscribing the workers
+_hash_pool = concurrent.futures.ThreadPoolExecutor(max_workers=os.cpu_count() or 2)
+
+def hash_password(password: str) -> str:
+    if password_hasher is not None:
+        return password_hasher.hash(password)
+    return generate_password_hash(password)
+
+def verify_password(stored_hash: str, password: str) -> bool:
+    if stored_hash.startswith('$argon2'):
+        if password_hasher is None:
+            return False
+        try:
+            return password_hasher.verify(stored_hash, password)
+        except (VerificationError, InvalidHashError):
+            return False
+    return check_password_hash(stored_hash, password)
+
+def password_needs_rehash(stored_hash: str) -> bool:
+    if password_hasher is None:
+        return False
+    if not stored_hash.startswith('$argon2'):
+        return True
+    return password_hasher.check_needs_rehash(stored_hash)
+
 # Authentication routes
 @app.route('/api/register', methods=['POST'])
 def register():
@@ -900,26 +1375,23 @@ def register():
         if not email or not password:
             return jsonify({'error': 'Email and password required'}), 400
         
-        conn = sqlite3.connect('stock_app.db')
-        c = conn.cursor()
-        
-        # Check if user exists
-        c.execute('SELECT id FROM users WHERE email = ?', (email,))
-        if c.fetchone():
-            conn.close()
-            return jsonify({'error': 'User already exists'}), 400
-        
-        # Create user
-        password_hash = generate_password_hash(password)
-        c.execute('INSERT INTO users (email, password_hash) VALUES (?, ?)', 
-                  (email, password_hash))
-        conn.commit()
+        with get_conn() as conn:
+            c = conn.cursor()
+            
+            # Check if user exists
+            c.execute('SELECT id FROM users WHERE email = ?', (email,))
+            if c.fetchone():
+                return jsonify({'error': 'User already exists'}), 400
+            
+            # Create user
+            password_hash = _hash_pool.submit(hash_password, password).result()
+            c.execute('INSERT INTO users (email, password_hash) VALUES (?, ?)', 
+                      (email, password_hash))
         
         user_id = c.lastrowid
         session['user_id'] = user_id
         session['email'] = email
         
-        conn.close()
         return jsonify({'success': True, 'message': 'Registration successful'})
         
     except Exception as e:
@@ -939,19 +1411,20 @@ def login():
         if not email or not password:
             return jsonify({'error': 'Email and password required'}), 400
         
-        conn = sqlite3.connect('stock_app.db')
-        c = conn.cursor()
-        
-        c.execute('SELECT id, password_hash FROM users WHERE email = ?', (email,))
-        user = c.fetchone()
-        
-        if user and check_password_hash(user[1], password):
+        with get_conn() as conn:
+            c = conn.cursor()
+            c.execute('SELECT id, password_hash FROM users WHERE email = ?', (email,))
+            user = c.fetchone()
+        
+        if user and _hash_pool.submit(verify_password, user[1], password).result():
+            if password_needs_rehash(user[1]):
+                new_hash = _hash_pool.submit(hash_password, password).result()
+                with get_conn() as conn:
+                    conn.execute('UPDATE users SET password_hash = ? WHERE id = ?', (new_hash, user[0]))
             session['user_id'] = user[0]
             session['email'] = email
-            conn.close()
             return jsonify({'success': True, 'message': 'Login successful'})
         else:
-            conn.close()
             return jsonify({'error': 'Invalid credentials'}), 401
             
     except Exception as e:
@@ -975,52 +1448,59 @@ def add_to_portfolio():
     
     try:
         data = request.get_json()
-        if not data:
+        if not data or not isinstance(data, dict):
             return jsonify({'error': 'No data provided'}), 400
-            
-        symbol = data.get('symbol', '').upper().replace('.NS', '')
-        shares = int(data.get('shares'))
-        purchase_price = float(data.get('purchase_price'))
-        purchase_date = data.get('purchase_date')
         
-        if not all([symbol, shares > 0, purchase_price > 0, purchase_date]):
-            return jsonify({'error': 'All fields are required and must be valid'}), 400
-        
-        conn = sqlite3.connect('stock_app.db')
-        c = conn.cursor()
+        # Either a single holding or a bulk import as {"items": [...]}
+        items = data.get('items') if isinstance(data.get('items'), list) else [data]
+        if not items:
+            return jsonify({'error': 'No data provided'}), 400
         
-        c.execute('''INSERT INTO portfolio (user_id, symbol, shares, purchase_price, purchase_date)
-                     VALUES (?, ?, ?, ?, ?)''',
-                  (session['user_id'], symbol, shares, purchase_price, purchase_date))
+        rows = []
+        for item in items:
+            if not isinstance(item, dict):
+                return jsonify({'error': 'All fields are required and must be valid'}), 400
+            symbol = strip_exchange_suffix(item.get('symbol') or '')
+            shares = int(item.get('shares'))
+            purchase_price = float(item.get('purchase_price'))
+            purchase_date = item.get('purchase_date')
+            
+            if not all([symbol, shares > 0, purchase_price > 0, purchase_date]):
+                return jsonify({'error': 'All fields are required and must be valid'}), 400
+            rows.append((session['user_id'], symbol, shares, purchase_price, purchase_date))
         
-        conn.commit()
-        conn.close()
+        # All rows go in one transaction
+        with get_conn() as conn:
+            conn.executemany('''INSERT INTO portfolio (user_id, symbol, shares, purchase_price, purchase_date)
+                                VALUES (?, ?, ?, ?, ?)''', rows)
         
-        return jsonify({'success': True, 'message': 'Stock added to portfolio'})
+        if len(rows) == 1:
+            return jsonify({'success': True, 'message': 'Stock added to portfolio'})
+        return jsonify({'success': True, 'message': f'{len(rows)} stocks added to portfolio', 'count': len(rows)})
         
     except Exception as e:
         logger.error(f"Add portfolio error: {e}")
         return jsonify({'error': 'Failed to add stock to portfolio'}), 500
 
+# Shared across requests for per-symbol history downloads
+_history_pool = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+
 @app.route('/api/portfolio/get')
 def get_portfolio():
     if 'user_id' not in session:
         return jsonify({'error': 'Not authenticated'}), 401
     
     try:
-        conn = sqlite3.connect('stock_app.db')
-        c = conn.cursor()
-        
-        c.execute('''SELECT symbol, shares, purchase_price, purchase_date, id
-                     FROM portfolio WHERE user_id = ?''', (session['user_id'],))
+        with get_conn() as conn:
+            c = conn.cursor()
+            c.execute('''SELECT symbol, shares, purchase_price, purchase_date, id
+                         FROM portfolio WHERE user_id = ?''', (session['user_id'],))
+            rows = c.fetchall()
         
         portfolio_data = []
         total_invested = 0
         total_current_value = 0
         
-        rows = c.fetchall()
-        conn.close()
-        
         if not rows:
             return jsonify({
                 'portfolio': [],
@@ -1032,25 +1512,35 @@ def get_portfolio():
                 }
             })
         
-        # Process portfolio items with threading for better performance
+        # Quote every holding in one batch and load each symbol's history once, concurrently
+        symbols = list(dict.fromkeys(row[0] for row in rows))
+        quotes = get_real_stock_prices_bulk(symbols)
+        history_futures = {sym: _history_pool.submit(get_ohlc_data, sym, "1y") for sym in symbols}
+        now = datetime.now()
+        
         def process_portfolio_item(row):
             try:
                 symbol, shares, purchase_price, purchase_date, portfolio_id = row
                 
                 # Get real current price
-                current_price, is_real = get_real_stock_price(symbol)
+                current_price, is_real = quotes[symbol]
                 
                 # Calculate days held
-                purchase_dt = datetime.strptime(purchase_date, '%Y-%m-%d')
-                days_since_purchase = (datetime.now() - purchase_dt).days
+                try:
+                    purchase_dt = datetime.fromisoformat(purchase_date)
+                except ValueError:
+                    # fromisoformat rejects dates without zero padding (2024-1-5)
+                    purchase_dt = datetime.strptime(purchase_date, '%Y-%m-%d')
+                days_since_purchase = (now - purchase_dt).days
                 
                 # Get historical highs and lows
                 try:
-                    hist = get_ohlc_data(symbol, "1y")
+                    hist = history_futures[symbol].result(timeout=30)
                     if not hist.empty and len(hist) > days_since_purchase:
-                        recent_hist = hist.tail(min(days_since_purchase + 1, len(hist)))
-                        highest_price = float(recent_hist['High'].max())
-                        lowest_price = float(recent_hist['Low'].min())
+                        # Reduce over the trailing window of the raw arrays rather than a copied frame
+                        n = max(1, min(days_since_purchase + 1, len(hist)))
+                        highest_price = float(np.nanmax(hist['High'].to_numpy()[-n:]))
+                        lowest_price = float(np.nanmin(hist['Low'].to_numpy()[-n:]))
                     else:
                         highest_price = current_price * 1.2
                         lowest_price = current_price * 0.8
@@ -1089,9 +1579,7 @@ def get_portfolio():
                 logger.error(f"Error processing portfolio item {symbol}: {e}")
                 return None
         
-        # Process portfolio items in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            portfolio_items = list(executor.map(process_portfolio_item, rows))
+        portfolio_items = [process_portfolio_item(row) for row in rows]
         
         # Filter out None results and calculate totals
         for item in portfolio_items:
@@ -1123,18 +1611,14 @@ def remove_from_portfolio(portfolio_id):
         return jsonify({'error': 'Not authenticated'}), 401
     
     try:
-        conn = sqlite3.connect('stock_app.db')
-        c = conn.cursor()
-        
-        c.execute('DELETE FROM portfolio WHERE id = ? AND user_id = ?', 
-                  (portfolio_id, session['user_id']))
+        with get_conn() as conn:
+            c = conn.cursor()
+            c.execute('DELETE FROM portfolio WHERE id = ? AND user_id = ?', 
+                      (portfolio_id, session['user_id']))
         
         if c.rowcount > 0:
-            conn.commit()
-            conn.close()
             return jsonify({'success': True, 'message': 'Stock removed from portfolio'})
         else:
-            conn.close()
             return jsonify({'error': 'Stock not found in portfolio'}), 404
         
     except Exception as e:
@@ -1174,6 +1658,42 @@ def search_stock():
         logger.error(f"Search stock error: {e}")
         return jsonify({'error': 'Search failed'}), 500
 
+# Model outputs shared by /api/predict and /api/top-stocks. Keys include the
+# calendar day so nothing computed on one day's data is served the next.
+_prediction_cache: Dict[tuple, tuple] = {}
+_sentiment_cache: Dict[tuple, tuple] = {}
+_model_cache_lock = threading.Lock()
+MODEL_CACHE_TTL = 3600
+MODEL_CACHE_MAXSIZE = 512
+
+def cached_price_prediction(hist, symbol, days_ahead, preferred_models):
+    """stock_predictor.predict_price, reused for an hour per symbol/horizon/model set"""
+    key = (symbol, days_ahead, tuple(preferred_models), datetime.now().date())
+    with _model_cache_lock:
+        cached = _prediction_cache.get(key)
+    if cached and cached[1] > time.time():
+        return cached[0]
+    result = stock_predictor.predict_price(hist, symbol, days_ahead, preferred_models=list(preferred_models))
+    # Failed runs are not cached so the next request retries
+    if result.get('predicted_prices'):
+        with _model_cache_lock:
+            _store_expiring(_prediction_cache, key, (result, time.time() + MODEL_CACHE_TTL),
+                            MODEL_CACHE_MAXSIZE)
+    return result
+
+def cached_stock_sentiment(symbol, days_back=30):
+    """sentiment_service.analyze_stock_sentiment, reused for an hour per symbol"""
+    key = (symbol, days_back, datetime.now().date())
+    with _model_cache_lock:
+        cached = _sentiment_cache.get(key)
+    if cached and cached[1] > time.time():
+        return cached[0]
+    score = sentiment_service.analyze_stock_sentiment(symbol, days_back=days_back)
+    with _model_cache_lock:
+        _store_expiring(_sentiment_cache, key, (score, time.time() + MODEL_CACHE_TTL),
+                        MODEL_CACHE_MAXSIZE)
+    return score
+
 @app.route('/api/predict', methods=['POST'])
 def predict_stock():
     try:
@@ -1181,7 +1701,7 @@ def predict_stock():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
             
-        symbol = data.get('symbol', '').upper().replace('.NS', '')
+        symbol = strip_exchange_suffix(data.get('symbol') or '')
         days_ahead = int(data.get('days_ahead', 5))
         
         if not symbol:
@@ -1193,19 +1713,14 @@ def predict_stock():
         # Get real current price
         current_price, is_real = get_real_stock_price(symbol)
         
-        # Get stock info
-        try:
-            ticker = yf.Ticker(f"{symbol}.NS")
-            info = ticker.info
-            stock_name = info.get('longName', f"{symbol} Ltd")
-        except:
-            # Fallback to stock database
-            for category, stocks in COMPREHENSIVE_STOCKS.items():
-                for stock in stocks:
-                    if stock['symbol'] == symbol:
-                        stock_name = stock['name']
-                        break
-            else:
+        # Get stock info: the stock database first, Yahoo only for symbols it doesn't know
+        known_stock = _BY_SYMBOL.get(symbol.lower())
+        if known_stock:
+            stock_name = known_stock['name']
+        else:
+            try:
+                stock_name = get_yahoo_stock_name(symbol)
+            except:
                 stock_name = f"{symbol} Ltd"
         
         # Get OHLC data for technical analysis
@@ -1215,13 +1730,12 @@ def predict_stock():
         technical_analysis = perform_technical_analysis(hist_data)
         
         # Generate historical data for chart
-        historical_data = []
         try:
-            for date, row in hist_data.tail(30).iterrows():
-                historical_data.append({
-                    'date': date.strftime('%Y-%m-%d'),
-                    'price': round(float(row['Close']), 2)
-                })
+            recent = hist_data.tail(30)
+            historical_data = [
+                {'date': d, 'price': p}
+                for d, p in zip(_chart_dates(recent), _rounded_column(recent, 'Close'))
+            ]
         except:
             historical_data = generate_sample_historical_data(current_price)
         
@@ -1238,7 +1752,7 @@ def predict_stock():
                 preferred_models = prefs.get('preferred_models')
             except Exception:
                 preferred_models = None
-            prediction_result = stock_predictor.predict_price(one_year_hist, symbol, days_ahead, preferred_models=preferred_models or ['random_forest','extra_trees','svr','lstm'])
+            prediction_result = cached_price_prediction(one_year_hist, symbol, days_ahead, preferred_models or ['random_forest','extra_trees','svr','lstm'])
             predicted_series = prediction_result.get('predicted_prices') or []
             base_predicted = float(predicted_series[-1]) if predicted_series else current_price
         except Exception as _:
@@ -1246,7 +1760,7 @@ def predict_stock():
 
         # Sentiment adjustment
         try:
-            sentiment_score = sentiment_service.analyze_stock_sentiment(symbol, days_back=30)
+            sentiment_score = cached_stock_sentiment(symbol, days_back=30)
             # Scale adjustment modestly: +/- up to 3%
             adjustment_pct = max(-0.03, min(0.03, sentiment_score / 100.0))
             predicted_price = base_predicted * (1 + adjustment_pct)
@@ -1287,20 +1801,33 @@ def predict_stock():
             'sentiment_analysis': sentiment_analysis,
             'is_real_price': is_real,
             'market_open': is_market_open(),
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
+            'timestamp': now_iso()
         })
         
     except Exception as e:
         logger.error(f"Prediction error: {e}")
         return jsonify({'error': str(e)}), 500
 
+# Serialized technical chart responses keyed by (symbol, period, chart_type):
+# (json_bytes, expiry_ts). Each entry expires together with the OHLC history it
+# was computed from, and a hit is returned without re-encoding.
+_technical_chart_cache: Dict[tuple, tuple] = {}
+_technical_chart_cache_lock = threading.Lock()
+TECHNICAL_CHART_CACHE_MAXSIZE = 512
+
 @app.route('/api/technical-chart/<symbol>')
 def get_technical_chart(symbol):
     try:
         chart_type = request.args.get('type', 'candlestick')
         period = request.args.get('period', '3mo')
         
-        symbol = symbol.upper().replace('.NS', '')
+        symbol = strip_exchange_suffix(symbol)
+        
+        cache_key = (symbol, period, chart_type)
+        with _technical_chart_cache_lock:
+            cached = _technical_chart_cache.get(cache_key)
+        if cached and cached[1] > time.time():
+            return app.response_class(cached[0], mimetype=app.json.mimetype)
         
         # Get OHLC data
         hist = get_ohlc_data(symbol, period)
@@ -1317,7 +1844,7 @@ def get_technical_chart(symbol):
         # Analyze patterns
         patterns = analyze_chart_patterns(hist, chart_type)
         
-        return jsonify({
+        response = jsonify({
             'symbol': symbol,
             'chart_type': chart_type,
             'period': period,
@@ -1327,10 +1854,26 @@ def get_technical_chart(symbol):
             'success': True
         })
         
+        # Sample-data fallbacks have no expiry and are never cached
+        expires = ohlc_cache_expiry(symbol, period)
+        if expires:
+            with _technical_chart_cache_lock:
+                if len(_technical_chart_cache) >= TECHNICAL_CHART_CACHE_MAXSIZE:
+                    _technical_chart_cache.pop(next(iter(_technical_chart_cache)))
+                _technical_chart_cache[cache_key] = (response.get_data(), expires)
+        
+        return response
+        
     except Exception as e:
         logger.error(f"Technical chart error for {symbol}: {e}")
         return jsonify({'error': str(e), 'success': False}), 500
 
+# Ranked stock lists keyed by (category, count, time_period): (stocks, expiry_ts)
+_top_stocks_cache: Dict[tuple, tuple] = {}
+_top_stocks_cache_lock = threading.Lock()
+TOP_STOCKS_CACHE_TTL = 300
+TOP_STOCKS_CACHE_MAXSIZE = 256
+
 @app.route('/api/top-stocks')
 def get_top_stocks():
     try:
@@ -1342,63 +1885,19 @@ def get_top_stocks():
         count = max(1, min(count, 10))
         time_period = max(1, min(time_period, 30))
         
-        stocks = COMPREHENSIVE_STOCKS.get(category, COMPREHENSIVE_STOCKS['safe'])
-        enhanced_stocks = []
-        
-        def process_stock(stock):
-            try:
-                # Get real current price
-                current_price, is_real = get_real_stock_price(stock['symbol'])
-                
-                # Calculate historical price change
-                try:
-                    hist = get_ohlc_data(stock['symbol'], f"{time_period + 10}d")
-                    if not hist.empty and len(hist) > time_period:
-                        past_price = float(hist['Close'].iloc[-(time_period + 1)])
-                        price_change = ((current_price - past_price) / past_price) * 100
-                    else:
-                        price_change = random.uniform(-5, 5)
-                except:
-                    price_change = random.uniform(-5, 5)
-                
-                # Generate prediction using ML ensemble (force models to run)
-                hist_1y = get_ohlc_data(stock['symbol'], "1y")
-                ta_analysis = perform_technical_analysis(hist_1y.tail(90) if not hist_1y.empty else hist_1y)
-                try:
-                    # Ensure models exist; retrain if missing
-                    pred_result = stock_predictor.predict_price(
-                        hist_1y, stock['symbol'], time_period,
-                        preferred_models=['random_forest','extra_trees','svr','lstm']
-                    )
-                    pred_series = pred_result.get('predicted_prices') or []
-                    predicted_price = float(pred_series[-1]) if pred_series else predict_future_price(current_price, ta_analysis, time_period)
-                except Exception:
-                    predicted_price = predict_future_price(current_price, ta_analysis, time_period)
-                predicted_change = ((predicted_price - current_price) / current_price) * 100
-                
-                return {
-                    'symbol': stock['symbol'],
-                    'name': stock['name'],
-                    'sector': stock['sector'],
-                    'current_price': round(current_price, 2),
-                    'predicted_price': round(predicted_price, 2),
-                    'predicted_change': round(predicted_change, 2),
-                    'price_change': round(price_change, 2),
-                    'prediction_confidence': random.randint(70, 90),
-                    'is_real_price': is_real,
-                    'time_period': time_period
-                }
-                
-            except Exception as e:
-                logger.error(f"Error processing stock {stock['symbol']}: {e}")
-                return None
-        
-        # Process stocks in parallel
-        with concurrent.futures.ThreadPoolExecutor(max_workers=5) as executor:
-            stock_results = list(executor.map(process_stock, stocks[:count]))
-        
-        # Filter out None results
-        enhanced_stocks = [stock for stock in stock_results if stock is not None]
+        # Unknown categories are served the 'safe' list, so they share its cache entries
+        stocks_category = category if category in COMPREHENSIVE_STOCKS else 'safe'
+        cache_key = (stocks_category, count, time_period)
+        with _top_stocks_cache_lock:
+            cached = _top_stocks_cache.get(cache_key)
+        if cached and cached[1] > time.time():
+            enhanced_stocks = cached[0]
+        else:
+            enhanced_stocks = _build_top_stocks(stocks_category, count, time_period)
+            with _top_stocks_cache_lock:
+                _store_expiring(_top_stocks_cache, cache_key,
+                                (enhanced_stocks, time.time() + TOP_STOCKS_CACHE_TTL),
+                                TOP_STOCKS_CACHE_MAXSIZE)
         
         return jsonify({
             'category': category,
@@ -1406,14 +1905,98 @@ def get_top_stocks():
             'time_period': time_period,
             'stocks': enhanced_stocks,
             'market_open': is_market_open(),
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
+            'timestamp': now_iso()
         })
         
     except Exception as e:
         logger.error(f"Top stocks error: {e}")
         return jsonify({'error': str(e)}), 500
 
+def _score_top_stock(stock, time_period):
+    """Price one stock and predict its move over time_period days"""
+    try:
+        # Get real current price
+        current_price, is_real = get_real_stock_price(stock['symbol'])
+        
+        # One year of history serves both the recent price change and the prediction
+        hist_1y = get_ohlc_data(stock['symbol'], "1y")
+        
+        # Calculate historical price change
+        try:
+            hist = hist_1y.tail(time_period + 10)
+            if not hist.empty and len(hist) > time_period:
+                past_price = float(hist['Close'].iloc[-(time_period + 1)])
+                price_change = ((current_price - past_price) / past_price) * 100
+            else:
+                price_change = random.uniform(-5, 5)
+        except:
+            price_change = random.uniform(-5, 5)
+        
+        # Generate prediction using ML ensemble (force models to run)
+        ta_analysis = perform_technical_analysis(hist_1y.tail(90) if not hist_1y.empty else hist_1y)
+        try:
+            # Ensure models exist; retrain if missing
+            pred_result = cached_price_prediction(
+                hist_1y, stock['symbol'], time_period,
+                ['random_forest','extra_trees','svr','lstm']
+            )
+            pred_series = pred_result.get('predicted_prices') or []
+            predicted_price = float(pred_series[-1]) if pred_series else predict_future_price(current_price, ta_analysis, time_period)
+        except Exception:
+            predicted_price = predict_future_price(current_price, ta_analysis, time_period)
+        predicted_change = ((predicted_price - current_price) / current_price) * 100
+        
+        return {
+            'symbol': stock['symbol'],
+            'name': stock['name'],
+            'sector': stock['sector'],
+            'current_price': round(current_price, 2),
+            'predicted_price': round(predicted_price, 2),
+            'predicted_change': round(predicted_change, 2),
+            'price_change': round(price_change, 2),
+            'prediction_confidence': random.randint(70, 90),
+            'is_real_price': is_real,
+            'time_period': time_period
+        }
+        
+    except Exception as e:
+        logger.error(f"Error processing stock {stock['symbol']}: {e}")
+        return None
+
+# Per-stock scoring runs on a shared pool, and concurrent requests asking for the
+# same (symbol, time_period) wait on the one computation already in flight
+_top_stocks_pool = concurrent.futures.ThreadPoolExecutor(max_workers=8)
+_top_stock_inflight: Dict[tuple, concurrent.futures.Future] = {}
+_top_stock_inflight_lock = threading.Lock()
+
+def _submit_top_stock(stock, time_period):
+    key = (stock['symbol'], time_period)
+    with _top_stock_inflight_lock:
+        future = _top_stock_inflight.get(key)
+        if future is not None:
+            return future
+        future = _top_stocks_pool.submit(_score_top_stock, stock, time_period)
+        _top_stock_inflight[key] = future
+
+    def _done(f):
+        with _top_stock_inflight_lock:
+            if _top_stock_inflight.get(key) is f:
+                del _top_stock_inflight[key]
+    future.add_done_callback(_done)
+    return future
+
+def _build_top_stocks(category, count, time_period):
+    """Price and predict the first `count` stocks of a category"""
+    stocks = COMPREHENSIVE_STOCKS.get(category, COMPREHENSIVE_STOCKS['safe'])
+    futures = [_submit_top_stock(stock, time_period) for stock in stocks[:count]]
+    stock_results = [future.result() for future in futures]
+    
+    # Filter out None results
+    return [stock for stock in stock_results if stock is not None]
+
 # AI Assistant route
+_ASSISTANT_ERROR_RESPONSE = 'I apologize, but I encountered an error while processing your question. Please try again or ask about stock market topics.'
+
 @app.route('/api/ai-assistant', methods=['POST'])
 def ai_assistant_route():
     try:
@@ -1452,14 +2035,14 @@ def ai_assistant_route():
         return jsonify({
             'question': question,
             'response': response,
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
+            'timestamp': now_iso()
         })
         
     except Exception as e:
         logger.error(f"AI assistant error: {e}")
         return jsonify({
             'question': question if 'question' in locals() else '',
-            'response': 'I apologize, but I encountered an error while processing your question. Please try again or ask about stock market topics.'
+            'response': _ASSISTANT_ERROR_RESPONSE
         }), 500
 
 @app.route('/api/calibrate', methods=['POST'])
@@ -1469,7 +2052,7 @@ def calibrate_prediction():
         if not data:
             return jsonify({'error': 'No data provided'}), 400
             
-        symbol = data.get('symbol', '').upper().replace('.NS', '')
+        symbol = strip_exchange_suffix(data.get('symbol') or '')
         days_ahead = int(data.get('days_ahead', 5))
         
         # Perform enhanced calibration using past 1y data
@@ -1487,7 +2070,7 @@ def calibrate_prediction():
             'symbol': symbol,
             'accuracy_score': accuracy_score,
             'message': f'Model calibrated with {accuracy_score:.2f}% accuracy',
-            'timestamp': datetime.utcnow().isoformat() + 'Z'
+            'timestamp': now_iso()
         })
         
     except Exception as e:
@@ -1521,7 +2104,7 @@ def get_news():
     try:
         category = request.args.get('category')
         if category:
-            filtered = [a for a in SAMPLE_NEWS if a.get('category', '').lower() == category.lower()]
+            filtered = _NEWS_BY_CATEGORY.get(category.lower(), [])
         else:
             filtered = SAMPLE_NEWS
         return jsonify({'articles': filtered, 'count': len(filtered)})
@@ -1530,41 +2113,98 @@ def get_news():
         return jsonify({'error': str(e)}), 500
 
 # Background alert checker (simple, in-process)
-def evaluate_condition(symbol: str, condition: str) -> bool:
+# The checker keeps the parsed alerts in memory and only re-reads the table after
+# an alert is added or deleted.
+_alert_table = ([], np.empty(0, dtype=np.int64), np.empty(0))
+_alerts_dirty = True
+_alerts_lock = threading.Lock()
+# Set when alerts change so the checker wakes up without waiting out its interval
+_alerts_changed = threading.Event()
+ALERT_CHECK_INTERVAL = 30
+
+def invalidate_alert_cache():
+    """Make the alert checker re-read the alerts table and run a cycle now"""
+    global _alerts_dirty
+    with _alerts_lock:
+        _alerts_dirty = True
+    _alerts_changed.set()
+
+def load_alerts():
+    """Alerts with a parsed condition as (rows, op_codes, thresholds), re-read only when changed.
+
+    rows are (id, user_id, symbol, condition); op_codes and thresholds are arrays
+    aligned with them.
+    """
+    global _alert_table, _alerts_dirty
+    with _alerts_lock:
+        if not _alerts_dirty:
+            return _alert_table
+        # Cleared before reading so a write that lands mid-read marks it dirty again
+        _alerts_dirty = False
     try:
-        price, _ = get_real_stock_price(symbol)
-        # very basic parser: supports price>n, price<n, price>=n, price<=n
-        cond = condition.replace(' ', '').lower()
-        if cond.startswith('price>='):
-            return price >= float(cond.split('>=')[1])
-        if cond.startswith('price<='):
-            return price <= float(cond.split('<=')[1])
-        if cond.startswith('price>'):
-            return price > float(cond.split('>')[1])
-        if cond.startswith('price<'):
-            return price < float(cond.split('<')[1])
+        with db() as conn:
+            fetched = conn.execute('SELECT id, user_id, symbol, condition, op_code, threshold FROM alerts '
+                                   'WHERE op_code IS NOT NULL').fetchall()
+    except Exception:
+        invalidate_alert_cache()
+        raise
+    table = (
+        [tuple(r[:4]) for r in fetched],
+        np.array([r[4] for r in fetched], dtype=np.int64),
+        np.array([r[5] for r in fetched], dtype=np.float64)
+    )
+    with _alerts_lock:
+        _alert_table = table
+    return table
+
+def conditions_met(op_codes, thresholds, prices):
+    """Check parsed alert conditions against prices; works on scalars or aligned arrays"""
+    return (((op_codes == 0) & (prices >= thresholds)) |
+            ((op_codes == 1) & (prices <= thresholds)) |
+            ((op_codes == 2) & (prices > thresholds)) |
+            ((op_codes == 3) & (prices < thresholds)))
+
+def evaluate_condition(symbol: str, condition: str, price: Optional[float] = None) -> bool:
+    try:
+        parsed = parse_alert_condition(condition)
+        if parsed is None:
+            return False
+        if price is None:
+            price, _ = get_real_stock_price(symbol)
+        return bool(conditions_met(parsed[0], parsed[1], price))
     except Exception as e:
         logger.debug(f"Alert condition eval error for {symbol}: {e}")
     return False
 
 def alert_checker_loop():
     while True:
+        alerts = None
         try:
-            conn = sqlite3.connect('stock_app.db')
-            c = conn.cursor()
-            c.execute('SELECT id, user_id, symbol, condition FROM alerts')
-            alerts = c.fetchall()
+            # Cleared before loading so a change made during this cycle wakes the next one
+            _alerts_changed.clear()
+            alerts, op_codes, thresholds = load_alerts()
             triggered = []
-            for aid, uid, sym, cond in alerts:
-                if evaluate_condition(sym, cond):
-                    triggered.append((aid, uid, sym, cond))
-            conn.close()
-            # Simple logging; UI can poll alerts and we can later add a notifications table
+            if alerts:
+                # One quote per distinct symbol per cycle, then every alert at once
+                prices = get_real_stock_prices_bulk(list({sym for _, _, sym, _ in alerts}))
+                alert_prices = np.array([prices[sym][0] for _, _, sym, _ in alerts], dtype=np.float64)
+                # Simulated fallback quotes must never trigger, since a notification is permanent
+                is_real = np.array([prices[sym][1] for _, _, sym, _ in alerts], dtype=bool)
+                hits = conditions_met(op_codes, thresholds, alert_prices) & is_real
+                triggered = [alerts[i] for i in np.flatnonzero(hits)]
+            if triggered:
+                # One transaction for the whole cycle; alerts already notified are skipped
+                with db() as conn:
+                    conn.executemany('INSERT OR IGNORE INTO notifications (alert_id, user_id, symbol, condition) '
+                                     'VALUES (?, ?, ?, ?)', triggered)
+                    conn.commit()
             for _, uid, sym, cond in triggered:
                 logger.info(f"Alert triggered for user {uid}: {sym} {cond}")
         except Exception as e:
             logger.debug(f"Alert checker error: {e}")
-        sleep(30)
+        # With no alerts there is nothing to poll, so sleep until one is added
+        timeout = None if alerts == [] else ALERT_CHECK_INTERVAL
+        _alerts_changed.wait(timeout)
 
 # Start alert checker in background
 try:
@@ -1573,10 +2213,36 @@ except Exception:
     pass
 
 # Helper functions
+def _ewm_mean(values, span):
+    """Same result as pandas Series.ewm(span=span).mean(), computed with one linear filter.
+
+    The series is filtered relative to its first value, so a flat series comes back
+    exactly flat rather than with rounding residue (which would flip MACD crossovers).
+    """
+    if len(values) == 0:
+        return np.asarray(values, dtype=np.float64)
+    beta = 1 - 2 / (span + 1)
+    offset = values[0]
+    weighted = lfilter([1.0], [1.0, -beta], values - offset)
+    weights = (1 - beta ** np.arange(1, len(values) + 1)) / (1 - beta)
+    return weighted / weights + offset
+
 def perform_technical_analysis(hist_data):
     """Comprehensive technical analysis"""
+    close_prices = hist_data['Close'].to_numpy(dtype=np.float64) if 'Close' in hist_data else np.empty(0)
+    return analyze_close_prices(close_prices)
+
+def _window_mean(window):
+    """Mean of a window of prices. Like a pandas rolling mean it returns the value
+    itself when every value is equal, so a flat series never reads as above or
+    below its average through rounding in the sum."""
+    last = window[-1]
+    return last if (window == last).all() else window.mean()
+
+def analyze_close_prices(close_prices):
+    """Technical analysis of a float64 array of closing prices"""
     try:
-        if hist_data.empty or len(hist_data) < 20:
+        if len(close_prices) < 20:
             return {
                 'trend': 'neutral',
                 'strength': 'weak',
@@ -1584,44 +2250,41 @@ def perform_technical_analysis(hist_data):
                 'signals': []
             }
         
-        # Calculate key indicators
-        close_prices = hist_data['Close']
+        # Only the latest value of each indicator is reported, so the windowed
+        # ones are computed from their tail alone.
         
         # Moving averages
-        sma_20 = close_prices.rolling(window=20).mean()
-        sma_50 = close_prices.rolling(window=50).mean() if len(hist_data) >= 50 else None
-        ema_12 = close_prices.ewm(span=12).mean()
-        ema_26 = close_prices.ewm(span=26).mean()
-        
-        # RSI
-        delta = close_prices.diff()
-        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-        rs = gain / loss
-        rsi = 100 - (100 / (1 + rs))
+        sma_20 = _window_mean(close_prices[-20:])
+        sma_50 = _window_mean(close_prices[-50:]) if len(close_prices) >= 50 else None
         
-        # MACD
-        macd_line = ema_12 - ema_26
-        macd_signal = macd_line.ewm(span=9).mean()
-        macd_histogram = macd_line - macd_signal
+        # RSI (14-period simple average of gains and losses)
+        delta = np.diff(close_prices[-15:])
+        gain = delta.clip(min=0).mean()
+        loss = (-delta).clip(min=0).mean()
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rsi = 100 - (100 / (1 + gain / loss))
+        
+        # MACD (the signal line needs the whole MACD series)
+        macd_line = _ewm_mean(close_prices, 12) - _ewm_mean(close_prices, 26)
+        macd_signal = _ewm_mean(macd_line, 9)
         
         # Bollinger Bands
         bb_middle = sma_20
-        bb_std = close_prices.rolling(window=20).std()
+        bb_std = close_prices[-20:].std(ddof=1)
         bb_upper = bb_middle + (bb_std * 2)
         bb_lower = bb_middle - (bb_std * 2)
         
         # Current values
-        current_price = float(close_prices.iloc[-1])
-        current_rsi = float(rsi.iloc[-1]) if not pd.isna(rsi.iloc[-1]) else 50
-        current_macd = float(macd_line.iloc[-1]) if not pd.isna(macd_line.iloc[-1]) else 0
-        current_macd_signal = float(macd_signal.iloc[-1]) if not pd.isna(macd_signal.iloc[-1]) else 0
+        current_price = float(close_prices[-1])
+        current_rsi = float(rsi) if not np.isnan(rsi) else 50
+        current_macd = float(macd_line[-1]) if not np.isnan(macd_line[-1]) else 0
+        current_macd_signal = float(macd_signal[-1]) if not np.isnan(macd_signal[-1]) else 0
         
         # Trend analysis
-        if sma_50 is not None and not sma_50.empty:
-            trend = 'bullish' if current_price > sma_20.iloc[-1] > sma_50.iloc[-1] else 'bearish' if current_price < sma_20.iloc[-1] < sma_50.iloc[-1] else 'neutral'
+        if sma_50 is not None:
+            trend = 'bullish' if current_price > sma_20 > sma_50 else 'bearish' if current_price < sma_20 < sma_50 else 'neutral'
         else:
-            trend = 'bullish' if current_price > sma_20.iloc[-1] else 'bearish'
+            trend = 'bullish' if current_price > sma_20 else 'bearish'
         
         # Strength calculation
         strength_score = 0
@@ -1631,7 +2294,7 @@ def perform_technical_analysis(hist_data):
         if current_macd > current_macd_signal: strength_score += 1
         else: strength_score -= 1
         
-        if current_price > bb_middle.iloc[-1]: strength_score += 1
+        if current_price > bb_middle: strength_score += 1
         else: strength_score -= 1
         
         if strength_score >= 2: strength = 'strong'
@@ -1657,9 +2320,9 @@ def perform_technical_analysis(hist_data):
                 'rsi': round(current_rsi, 2),
                 'macd': round(current_macd, 4),
                 'macd_signal': round(current_macd_signal, 4),
-                'sma_20': round(float(sma_20.iloc[-1]), 2),
-                'bb_upper': round(float(bb_upper.iloc[-1]), 2),
-                'bb_lower': round(float(bb_lower.iloc[-1]), 2),
+                'sma_20': round(float(sma_20), 2),
+                'bb_upper': round(float(bb_upper), 2),
+                'bb_lower': round(float(bb_lower), 2),
                 'current_price': round(current_price, 2)
             },
             'signals': signals,
@@ -1910,85 +2573,80 @@ def process_chart_data(hist, chart_type):
         logger.error(f"Chart data processing error: {e}")
         return []
 
+def _chart_dates(hist):
+    """Index dates of a history frame as YYYY-MM-DD strings"""
+    return hist.index.strftime('%Y-%m-%d').tolist()
+
+def _rounded_column(hist, column):
+    """Column values as Python floats rounded to 2 decimals"""
+    return [round(v, 2) for v in hist[column].to_numpy(dtype=np.float64).tolist()]
+
 def process_candlestick_data(hist):
     """Process data for candlestick chart"""
-    data = []
-    for date, row in hist.iterrows():
-        data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'open': round(float(row['Open']), 2),
-            'high': round(float(row['High']), 2),
-            'low': round(float(row['Low']), 2),
-            'close': round(float(row['Close']), 2),
-            'volume': int(row['Volume'])
-        })
-    return data
+    return [
+        {'date': d, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': int(v)}
+        for d, o, h, l, c, v in zip(
+            _chart_dates(hist),
+            _rounded_column(hist, 'Open'),
+            _rounded_column(hist, 'High'),
+            _rounded_column(hist, 'Low'),
+            _rounded_column(hist, 'Close'),
+            hist['Volume'].tolist()
+        )
+    ]
 
 def process_renko_data(hist):
     """Process data for Renko chart (simplified)"""
     if len(hist) == 0:
         return []
         
-    brick_size = hist['Close'].std() * 0.3
-    data = []
-    current_price = float(hist['Close'].iloc[0])
-    
-    for date, row in hist.iterrows():
-        close_price = float(row['Close'])
-        data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'price': round(close_price, 2),
-            'direction': 1 if close_price > current_price else -1,
-            'brick_size': round(brick_size, 2)
-        })
-        current_price = close_price
+    brick_size = round(hist['Close'].std() * 0.3, 2)
+    close_prices = hist['Close'].to_numpy(dtype=np.float64)
+    # Each close is compared with the previous one; the first with itself
+    previous = np.concatenate((close_prices[:1], close_prices[:-1]))
+    directions = np.where(close_prices > previous, 1, -1).tolist()
     
-    return data
+    return [
+        {'date': d, 'price': p, 'direction': direction, 'brick_size': brick_size}
+        for d, p, direction in zip(_chart_dates(hist), _rounded_column(hist, 'Close'), directions)
+    ]
 
 def process_kagi_data(hist):
     """Process data for Kagi chart (simplified)"""
-    data = []
-    for date, row in hist.iterrows():
-        data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'price': round(float(row['Close']), 2)
-        })
-    return data
+    return [
+        {'date': d, 'price': p}
+        for d, p in zip(_chart_dates(hist), _rounded_column(hist, 'Close'))
+    ]
 
 def process_point_figure_data(hist):
     """Process data for Point & Figure chart (simplified)"""
-    data = []
-    for date, row in hist.iterrows():
-        data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'price': round(float(row['Close']), 2),
-            'type': 'X' if random.random() > 0.5 else 'O'
-        })
-    return data
+    return [
+        {'date': d, 'price': p, 'type': 'X' if random.random() > 0.5 else 'O'}
+        for d, p in zip(_chart_dates(hist), _rounded_column(hist, 'Close'))
+    ]
 
 def process_breakout_data(hist):
     """Process data for breakout analysis"""
     if len(hist) < 20:
         return []
         
-    data = []
     window = 20
     
-    for i in range(window, len(hist)):
-        current_data = hist.iloc[i-window:i]
-        resistance = current_data['High'].max()
-        support = current_data['Low'].min()
-        current_price = float(hist.iloc[i]['Close'])
-        current_date = hist.index[i]
-        
-        data.append({
-            'date': current_date.strftime('%Y-%m-%d'),
-            'price': round(current_price, 2),
-            'resistance': round(resistance, 2),
-            'support': round(support, 2)
-        })
+    # Levels for row i come from the `window` rows before it
+    highs = hist['High'].to_numpy(dtype=np.float64)
+    lows = hist['Low'].to_numpy(dtype=np.float64)
+    resistance = np.round(np.fmax.reduce(sliding_window_view(highs, window)[:-1], axis=1), 2).tolist()
+    support = np.round(np.fmin.reduce(sliding_window_view(lows, window)[:-1], axis=1), 2).tolist()
     
-    return data
+    return [
+        {'date': d, 'price': p, 'resistance': r, 'support': s}
+        for d, p, r, s in zip(
+            _chart_dates(hist)[window:],
+            _rounded_column(hist, 'Close')[window:],
+            resistance,
+            support
+        )
+    ]
 
 def calculate_comprehensive_indicators(hist):
     """Calculate comprehensive technical indicators"""
@@ -2006,36 +2664,35 @@ def calculate_comprehensive_indicators(hist):
                 'volume_sma': None
             }
         
-        close_prices = hist['Close']
+        # Convert once; each windowed indicator only needs its last value, so it is
+        # computed from the tail of the arrays rather than a full rolling Series.
+        close_prices = hist['Close'].to_numpy(dtype=np.float64)
+        high_prices = hist['High'].to_numpy(dtype=np.float64)
+        low_prices = hist['Low'].to_numpy(dtype=np.float64)
         
-        # RSI
+        # RSI (the first diff is NaN and counts as no gain and no loss)
         rsi_value = None
         try:
-            delta = close_prices.diff()
-            gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-            loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-            rs = gain / loss
-            rsi = 100 - (100 / (1 + rs))
-            if not rsi.empty:
-                rsi_value = float(rsi.iloc[-1])
+            delta = np.diff(close_prices[-15:])
+            gain = np.where(delta > 0, delta, 0).sum() / 14
+            loss = np.where(delta < 0, -delta, 0).sum() / 14
+            with np.errstate(divide='ignore', invalid='ignore'):
+                rsi_value = float(100 - (100 / (1 + gain / loss)))
         except:
             pass
         
         # Moving Averages
-        sma_20 = close_prices.rolling(window=20).mean().iloc[-1] if len(hist) >= 20 else None
-        sma_50 = close_prices.rolling(window=50).mean().iloc[-1] if len(hist) >= 50 else None
+        sma_20 = close_prices[-20:].mean() if len(hist) >= 20 else None
+        sma_50 = close_prices[-50:].mean() if len(hist) >= 50 else None
         
         # MACD
         macd_value = None
         macd_signal_value = None
         try:
-            ema_12 = close_prices.ewm(span=12).mean()
-            ema_26 = close_prices.ewm(span=26).mean()
-            macd = ema_12 - ema_26
-            macd_signal = macd.ewm(span=9).mean()
-            if not macd.empty:
-                macd_value = float(macd.iloc[-1])
-                macd_signal_value = float(macd_signal.iloc[-1])
+            macd = _ewm_mean(close_prices, 12) - _ewm_mean(close_prices, 26)
+            macd_signal = _ewm_mean(macd, 9)
+            macd_value = float(macd[-1])
+            macd_signal_value = float(macd_signal[-1])
         except:
             pass
         
@@ -2044,23 +2701,23 @@ def calculate_comprehensive_indicators(hist):
         bb_lower = None
         try:
             if len(hist) >= 20:
-                sma = close_prices.rolling(window=20).mean()
-                std = close_prices.rolling(window=20).std()
-                bb_upper = float((sma + (std * 2)).iloc[-1])
-                bb_lower = float((sma - (std * 2)).iloc[-1])
+                std = close_prices[-20:].std(ddof=1)
+                bb_upper = float(sma_20 + (std * 2))
+                bb_lower = float(sma_20 - (std * 2))
         except:
             pass
         
-        # ATR
+        # ATR (the first row has no previous close, so a 14-row history has none)
         atr_value = None
         try:
-            high_low = hist['High'] - hist['Low']
-            high_close = np.abs(hist['High'] - hist['Close'].shift())
-            low_close = np.abs(hist['Low'] - hist['Close'].shift())
-            true_range = np.maximum(high_low, np.maximum(high_close, low_close))
-            atr = true_range.rolling(window=14).mean()
-            if not atr.empty:
-                atr_value = float(atr.iloc[-1])
+            if len(hist) >= 15:
+                prev_close = close_prices[-15:-1]
+                high = high_prices[-14:]
+                low = low_prices[-14:]
+                true_range = np.maximum(high - low, np.maximum(np.abs(high - prev_close), np.abs(low - prev_close)))
+                atr_value = float(true_range.mean())
+            else:
+                atr_value = float('nan')
         except:
             pass
         
@@ -2073,7 +2730,7 @@ def calculate_comprehensive_indicators(hist):
             'bb_upper': round(bb_upper, 2) if bb_upper is not None else None,
             'bb_lower': round(bb_lower, 2) if bb_lower is not None else None,
             'atr': round(atr_value, 2) if atr_value is not None else None,
-            'volume_sma': round(float(hist['Volume'].rolling(window=20).mean().iloc[-1]), 0) if len(hist) >= 20 else None
+            'volume_sma': round(float(hist['Volume'].to_numpy(dtype=np.float64)[-20:].mean()), 0) if len(hist) >= 20 else None
         }
         
     except Exception as e:
@@ -2095,27 +2752,31 @@ def analyze_chart_patterns(hist, chart_type):
         # Calculate support and resistance levels
         recent_data = hist.tail(50) if len(hist) >= 50 else hist
         
-        # Resistance (local maxima)
-        highs = recent_data['High']
-        for i in range(5, len(highs) - 5):
-            if highs.iloc[i] == highs.iloc[i-5:i+6].max():
-                patterns['resistance_levels'].append(round(float(highs.iloc[i]), 2))
-        
-        # Support (local minima)
-        lows = recent_data['Low']
-        for i in range(5, len(lows) - 5):
-            if lows.iloc[i] == lows.iloc[i-5:i+6].min():
-                patterns['support_levels'].append(round(float(lows.iloc[i]), 2))
+        # Local extrema: a point is a level when it equals the max (or min) of the
+        # 11-row window centred on it. fmax/fmin skip NaN like pandas does.
+        if len(recent_data) >= 11:
+            # Resistance (local maxima)
+            highs = recent_data['High'].to_numpy(dtype=np.float64)
+            centres = highs[5:-5]
+            mask = centres == np.fmax.reduce(sliding_window_view(highs, 11), axis=1)
+            patterns['resistance_levels'] = [round(v, 2) for v in centres[mask].tolist()]
+            
+            # Support (local minima)
+            lows = recent_data['Low'].to_numpy(dtype=np.float64)
+            centres = lows[5:-5]
+            mask = centres == np.fmin.reduce(sliding_window_view(lows, 11), axis=1)
+            patterns['support_levels'] = [round(v, 2) for v in centres[mask].tolist()]
         
         # Remove duplicates and sort
         patterns['resistance_levels'] = sorted(list(set(patterns['resistance_levels'])), reverse=True)[:5]
         patterns['support_levels'] = sorted(list(set(patterns['support_levels'])))[:5]
         
         # Pattern detection
-        close_prices = hist['Close'].tail(20)
+        close_prices = hist['Close'].to_numpy(dtype=np.float64)[-20:]
         if len(close_prices) >= 10:
             # Trend analysis
-            returns = close_prices.pct_change().dropna()
+            returns = close_prices[1:] / close_prices[:-1] - 1
+            returns = returns[~np.isnan(returns)]
             avg_return = returns.mean()
             
             if avg_return > 0.002:
@@ -2126,7 +2787,7 @@ def analyze_chart_patterns(hist, chart_type):
                 patterns['detected_patterns'].append('Sideways Movement')
             
             # Volatility analysis
-            volatility = returns.std()
+            volatility = returns.std(ddof=1)
             if volatility > 0.03:
                 patterns['detected_patterns'].append('High Volatility')
             elif volatility < 0.01:
@@ -2148,6 +2809,7 @@ def perform_advanced_calibration(symbol, days_ahead):
         
         accuracies = []
         test_periods = min(10, len(hist) // (days_ahead + 10))
+        close_prices = hist['Close'].to_numpy(dtype=np.float64)
         
         for i in range(test_periods):
             try:
@@ -2158,17 +2820,17 @@ def perform_advanced_calibration(symbol, days_ahead):
                     break
                 
                 # Historical data for prediction
-                hist_subset = hist.iloc[start_idx:start_idx + 30] if start_idx + 30 < len(hist) else hist.iloc[start_idx:]
+                close_subset = close_prices[start_idx:start_idx + 30]
                 
-                if len(hist_subset) < 10:
+                if len(close_subset) < 10:
                     continue
                 
                 # Actual future price
-                actual_price = float(hist.iloc[end_idx]['Close'])
-                base_price = float(hist.iloc[start_idx]['Close'])
+                actual_price = float(close_prices[end_idx])
+                base_price = float(close_prices[start_idx])
                 
                 # Perform technical analysis on subset
-                tech_analysis = perform_technical_analysis(hist_subset)
+                tech_analysis = analyze_close_prices(close_subset)
                 
                 # Predict price
                 predicted_price = predict_future_price(base_price, tech_analysis, days_ahead)
@@ -2195,12 +2857,10 @@ def perform_advanced_calibration(symbol, days_ahead):
                 'days_ahead': days_ahead
             }
             
-            conn = sqlite3.connect('stock_app.db')
-            c = conn.cursor()
-            c.execute('INSERT INTO calibrations (symbol, calibration_data, accuracy_score) VALUES (?, ?, ?)',
-                      (symbol, json.dumps(calibration_data), avg_accuracy))
-            conn.commit()
-            conn.close()
+            with db() as conn:
+                conn.execute('INSERT INTO calibrations (symbol, calibration_data, accuracy_score) VALUES (?, ?, ?)',
+                             (symbol, app.json.dumps(calibration_data), avg_accuracy))
+                conn.commit()
         except Exception as e:
             logger.warning(f"Failed to store calibration: {e}")
         
@@ -2212,48 +2872,36 @@ def perform_advanced_calibration(symbol, days_ahead):
 
 def generate_sample_historical_data(current_price, days=30):
     """Generate sample historical data for charts"""
-    data = []
-    base_date = datetime.now() - timedelta(days=days)
-    price = current_price * 0.95
+    base_date = datetime.now().date() - timedelta(days=days)
+    changes = _chart_rng.uniform(-0.03, 0.04, days)
+    prices = current_price * 0.95 * np.cumprod(1 + changes)
+    dates = np.datetime_as_string(np.datetime64(base_date) + np.arange(days), unit='D').tolist()
     
-    for i in range(days):
-        date = base_date + timedelta(days=i)
-        change = random.uniform(-0.03, 0.04)
-        price = price * (1 + change)
-        data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'price': round(price, 2)
-        })
-    
-    return data
+    return [{'date': d, 'price': round(p, 2)} for d, p in zip(dates, prices.tolist())]
 
 def generate_prediction_data(current_price, predicted_price, days_ahead):
     """Generate prediction data points for chart"""
-    data = []
-    base_date = datetime.now()
+    base_date = datetime.now().date()
     
-    data.append({
-        'date': base_date.strftime('%Y-%m-%d'),
+    data = [{
+        'date': base_date.isoformat(),
         'price': current_price,
         'is_prediction': False
-    })
+    }]
     
+    steps = np.arange(1, days_ahead + 1)
     price_diff = predicted_price - current_price
-    for i in range(1, days_ahead + 1):
-        date = base_date + timedelta(days=i)
-        progress = i / days_ahead
-        predicted_point = current_price + (price_diff * progress)
-        predicted_point *= random.uniform(0.995, 1.005)  # Small random variation
-        
-        data.append({
-            'date': date.strftime('%Y-%m-%d'),
-            'price': round(predicted_point, 2),
-            'is_prediction': True
-        })
+    points = current_price + price_diff * (steps / days_ahead)
+    points *= _chart_rng.uniform(0.995, 1.005, len(steps))  # Small random variation
+    dates = np.datetime_as_string(np.datetime64(base_date) + steps, unit='D').tolist()
     
+    data.extend(
+        {'date': d, 'price': round(p, 2), 'is_prediction': True}
+        for d, p in zip(dates, points.tolist())
+    )
     return data
 
 if __name__ == '__main__':
     port = int(os.environ.get('PORT', 5000))
-    debug = os.environ.get('DEBUG', 'True').lower() == 'true'
+    debug = os.environ.get('DEBUG', 'False').lower() == 'true'
     app.run(host='0.0.0.0', port=port, debug=debug)
\ No newline at end of file
@@ -0,0 +1,19 @@
+"""Gunicorn settings, picked up automatically by ``gunicorn wsgi:app`` run from this directory"""
+
+import os
+
+bind = f"0.0.0.0:{os.environ.get('PORT', 5000)}"
+
+# One worker process with a pool of threads. The quote, history and prediction
+# caches, the in-flight request sharing and the background alert checker all live
+# in process memory, so extra processes would each repeat that work. Requests
+# spend most of their time waiting on Yahoo and other HTTP APIs, which releases
+# the GIL, so threads give the concurrency. gevent is not used: yfinance does
+# its HTTP through curl_cffi, a C extension that monkey-patching cannot make
+# cooperative.
+workers = int(os.environ.get('WEB_CONCURRENCY', 1))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', 16))
+
+# Model training on a cold symbol can take a while
+timeout = 120
@@ -3,16 +3,17 @@
 """
 Models package for Stock Market Predictor
 Contains all ML models and data processing components
+
+ChartAnalyzer is not imported here: no route uses it, and loading it pulls in
+ta and the Renko helpers. Import it from models.chart_analyzer where needed.
 """
 
 from .stock_predictor import StockPredictor
-from .chart_analyzer import ChartAnalyzer
 from .sentiment_analyzer import SentimentAnalyzer
 from .data_fetcher import DataFetcher
 
 __all__ = [
     'StockPredictor',
-    'ChartAnalyzer', 
     'SentimentAnalyzer',
     'DataFetcher'
 ]
\ No newline at end of file
@@ -5,10 +5,8 @@ Handles various chart types including Candlestick, Renko, Kagi, Point & Figure,
 
 import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import mplfinance as mpf
-import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+from numpy.lib.stride_tricks import sliding_window_view
+from scipy.signal import lfilter
 import logging
 from typing import Dict, List, Any, Optional, Tuple
 import ta
@@ -21,6 +19,34 @@ from renko import Renko
 
 logger = logging.getLogger(__name__)
 
+def _tail_mean(values: np.ndarray, window: int) -> float:
+    """Latest value of a rolling mean; NaN until a full window is available"""
+    return values[-window:].mean() if len(values) >= window else np.float64(np.nan)
+
+def _ewma(values: np.ndarray, alpha: float) -> np.ndarray:
+    """pandas ewm(alpha=alpha, adjust=False).mean() of a NaN-free array, as one linear filter"""
+    if len(values) == 0:
+        return values.astype(np.float64)
+    return lfilter([alpha], [1.0, alpha - 1.0], values, zi=[(1 - alpha) * values[0]])[0]
+
+def _latest_atr(data: pd.DataFrame, window: int = 14) -> float:
+    """Latest Wilder ATR, as ta.volatility.average_true_range(...).iloc[-1]; NaN
+    until a full window is available"""
+    high = data['High'].to_numpy(dtype=np.float64)
+    low = data['Low'].to_numpy(dtype=np.float64)
+    close = data['Close'].to_numpy(dtype=np.float64)
+    if len(close) < window:
+        return np.float64(np.nan)
+    
+    # Mean of the first `window` true ranges, then Wilder smoothing
+    prev_close = np.concatenate(([np.nan], close[:-1]))
+    true_range = np.fmax(high - low, np.fmax(np.abs(high - prev_close), np.abs(low - prev_close)))
+    atr = true_range[:window].mean()
+    if len(close) > window:
+        decay = (window - 1) / window
+        atr = lfilter([1 / window], [1.0, -decay], true_range[window:], zi=[atr * decay])[0][-1]
+    return atr
+
 class ChartAnalyzer:
     """
     Analyzes various types of financial charts and provides technical analysis
@@ -102,18 +128,16 @@ class ChartAnalyzer:
             Dictionary with chart data in JSON format
         """
         try:
-            # Prepare data for candlestick chart
-            chart_data = []
-            
-            for index, row in data.iterrows():
-                chart_data.append({
-                    'x': index.strftime('%Y-%m-%d'),
-                    'open': round(row['Open'], 2),
-                    'high': round(row['High'], 2),
-                    'low': round(row['Low'], 2),
-                    'close': round(row['Close'], 2),
-                    'volume': int(row['Volume']) if 'Volume' in row else 0
-                })
+            # Prepare data for candlestick chart: format the dates once and round
+            # whole columns instead of walking the frame row by row
+            dates = data.index.strftime('%Y-%m-%d').tolist()
+            ohlc = np.round(data[['Open', 'High', 'Low', 'Close']].to_numpy(dtype=np.float64), 2).tolist()
+            volumes = [int(v) for v in data['Volume'].tolist()] if 'Volume' in data else [0] * len(data)
+            
+            chart_data = [
+                {'x': x, 'open': o, 'high': h, 'low': l, 'close': c, 'volume': v}
+                for x, (o, h, l, c), v in zip(dates, ohlc, volumes)
+            ]
             
             # Calculate moving averages for overlay
             data_with_ma = data.copy()
@@ -121,15 +145,15 @@ class ChartAnalyzer:
             data_with_ma['SMA_50'] = ta.trend.sma_indicator(data['Close'], window=50)
             data_with_ma['EMA_12'] = ta.trend.ema_indicator(data['Close'], window=12)
             
-            # Add moving averages to chart data
-            ma_data = []
-            for index, row in data_with_ma.iterrows():
-                ma_data.append({
-                    'x': index.strftime('%Y-%m-%d'),
-                    'sma_20': round(row['SMA_20'], 2) if not pd.isna(row['SMA_20']) else None,
-                    'sma_50': round(row['SMA_50'], 2) if not pd.isna(row['SMA_50']) else None,
-                    'ema_12': round(row['EMA_12'], 2) if not pd.isna(row['EMA_12']) else None
-                })
+            # Add moving averages to chart data (NaN warm-up values become None)
+            ma_columns = [
+                [None if np.isnan(v) else v for v in np.round(data_with_ma[col].to_numpy(dtype=np.float64), 2).tolist()]
+                for col in ('SMA_20', 'SMA_50', 'EMA_12')
+            ]
+            ma_data = [
+                {'x': x, 'sma_20': sma_20, 'sma_50': sma_50, 'ema_12': ema_12}
+                for x, sma_20, sma_50, ema_12 in zip(dates, *ma_columns)
+            ]
             
             return {
                 'type': 'candlestick',
@@ -200,7 +224,9 @@ class ChartAnalyzer:
             Dictionary with Kagi chart data
         """
         try:
-            prices = data['Close'].values
+            # The state machine below runs on Python floats; arithmetic on NumPy
+            # scalars costs several times more per step
+            prices = data['Close'].to_numpy(dtype=np.float64).tolist()
             kagi_data = []
             
             if len(prices) < 2:
@@ -259,10 +285,11 @@ class ChartAnalyzer:
                         current_price = price
             
             # Convert to chart data
-            for i, (x, y, line_type) in enumerate(kagi_points):
+            rounded = np.round([y for _, y, _ in kagi_points], 2).tolist()
+            for (x, _, line_type), y in zip(kagi_points, rounded):
                 kagi_data.append({
                     'x': x,
-                    'y': round(y, 2),
+                    'y': y,
                     'type': line_type,
                     'thickness': 'thick' if line_type == 'yang' else 'thin'
                 })
@@ -291,12 +318,13 @@ class ChartAnalyzer:
             Dictionary with Point & Figure chart data
         """
         try:
-            prices = data['Close'].values
+            prices = data['Close'].to_numpy(dtype=np.float64)
             
             # Calculate box size based on ATR if not provided
             if box_size is None:
-                atr = ta.volatility.average_true_range(data['High'], data['Low'], data['Close'], window=14)
-                box_size = round(atr.iloc[-1] * 0.5, 2)  # Half of ATR
+                box_size = round(_latest_atr(data) * 0.5, 2)  # Half of ATR
+                if np.isnan(box_size):
+                    raise ValueError('Not enough data for ATR box size')
             
             if box_size <= 0:
                 box_size = 1.0
@@ -307,17 +335,20 @@ class ChartAnalyzer:
             if len(prices) < 2:
                 return {'type': 'point_figure', 'data': [], 'error': 'Insufficient data'}
             
+            step = float(box_size)
+            
+            # Box index of every close in one pass (truncating, as int() does), as
+            # Python ints for the column state machine below
+            boxes = (prices / step).astype(np.int64).tolist()
+            
             # Initialize first column
-            start_price = prices[0]
-            start_box = int(start_price / box_size)
+            start_box = boxes[0]
             current_column = 0
             current_direction = None
             current_high = start_box
             current_low = start_box
             
-            for price in prices[1:]:
-                current_box = int(price / box_size)
-                
+            for current_box in boxes[1:]:
                 if current_direction is None:
                     # Determine initial direction
                     if current_box > start_box:
@@ -329,7 +360,7 @@ class ChartAnalyzer:
                                 'column': current_column,
                                 'box': box,
                                 'symbol': 'X',
-                                'price': box * box_size
+                                'price': box * step
                             })
                     elif current_box < start_box:
                         current_direction = 'O'
@@ -340,7 +371,7 @@ class ChartAnalyzer:
                                 'column': current_column,
                                 'box': box,
                                 'symbol': 'O',
-                                'price': box * box_size
+                                'price': box * step
                             })
                 
                 elif current_direction == 'X':
@@ -351,7 +382,7 @@ class ChartAnalyzer:
                                 'column': current_column,
                                 'box': box,
                                 'symbol': 'X',
-                                'price': box * box_size
+                                'price': box * step
                             })
                         current_high = current_box
                     elif current_box <= current_high - reversal_amount:
@@ -364,7 +395,7 @@ class ChartAnalyzer:
                                 'column': current_column,
                                 'box': box,
                                 'symbol': 'O',
-                                'price': box * box_size
+                                'price': box * step
                             })
                 
                 elif current_direction == 'O':
@@ -375,7 +406,7 @@ class ChartAnalyzer:
                                 'column': current_column,
                                 'box': box,
                                 'symbol': 'O',
-                                'price': box * box_size
+                                'price': box * step
                             })
                         current_low = current_box
                     elif current_box >= current_low + reversal_amount:
@@ -388,7 +419,7 @@ class ChartAnalyzer:
                                 'column': current_column,
                                 'box': box,
                                 'symbol': 'X',
-                                'price': box * box_size
+                                'price': box * step
                             })
             
             return {
@@ -685,42 +716,70 @@ class ChartAnalyzer:
             Dictionary with technical indicators
         """
         try:
+            # One conversion per column; every indicator below reads these arrays and
+            # reports its latest value with the same definition (and warm-up NaN) as ta
+            close = data['Close'].to_numpy(dtype=np.float64)
+            high = data['High'].to_numpy(dtype=np.float64)
+            low = data['Low'].to_numpy(dtype=np.float64)
+            volume = data['Volume'].to_numpy(dtype=np.float64)
+            n = len(close)
             indicators = {}
             
             # Moving Averages
-            indicators['sma_20'] = round(ta.trend.sma_indicator(data['Close'], window=20).iloc[-1], 2)
-            indicators['sma_50'] = round(ta.trend.sma_indicator(data['Close'], window=50).iloc[-1], 2)
-            indicators['ema_12'] = round(ta.trend.ema_indicator(data['Close'], window=12).iloc[-1], 2)
-            indicators['ema_26'] = round(ta.trend.ema_indicator(data['Close'], window=26).iloc[-1], 2)
-            
-            # RSI
-            indicators['rsi'] = round(ta.momentum.rsi(data['Close'], window=14).iloc[-1], 2)
-            
-            # MACD
-            macd_line = ta.trend.macd_diff(data['Close'])
-            macd_signal = ta.trend.macd_signal(data['Close'])
-            indicators['macd'] = round(macd_line.iloc[-1], 4)
-            indicators['macd_signal'] = round(macd_signal.iloc[-1], 4)
-            indicators['macd_histogram'] = round(macd_line.iloc[-1] - macd_signal.iloc[-1], 4)
-            
-            # Bollinger Bands
-            bb_high = ta.volatility.bollinger_hband(data['Close'])
-            bb_low = ta.volatility.bollinger_lband(data['Close'])
-            indicators['bb_upper'] = round(bb_high.iloc[-1], 2)
-            indicators['bb_lower'] = round(bb_low.iloc[-1], 2)
-            indicators['bb_width'] = round((bb_high.iloc[-1] - bb_low.iloc[-1]) / data['Close'].iloc[-1] * 100, 2)
-            
-            # ATR
-            indicators['atr'] = round(ta.volatility.average_true_range(data['High'], data['Low'], data['Close']).iloc[-1], 2)
-            
-            # Stochastic
-            stoch_k = ta.momentum.stoch(data['High'], data['Low'], data['Close'])
-            stoch_d = ta.momentum.stoch_signal(data['High'], data['Low'], data['Close'])
-            indicators['stoch_k'] = round(stoch_k.iloc[-1], 2)
-            indicators['stoch_d'] = round(stoch_d.iloc[-1], 2)
+            sma_20 = _tail_mean(close, 20)
+            ema_12 = _ewma(close, 2 / 13)
+            ema_26 = _ewma(close, 2 / 27)
+            indicators['sma_20'] = round(sma_20, 2)
+            indicators['sma_50'] = round(_tail_mean(close, 50), 2)
+            indicators['ema_12'] = round(ema_12[-1] if n >= 12 else np.nan, 2)
+            indicators['ema_26'] = round(ema_26[-1] if n >= 26 else np.nan, 2)
+            
+            # RSI (Wilder smoothing of gains and losses)
+            delta = np.diff(close, prepend=np.nan)
+            avg_gain = _ewma(np.where(delta > 0, delta, 0.0), 1 / 14)[-1]
+            avg_loss = _ewma(np.where(delta < 0, -delta, 0.0), 1 / 14)[-1]
+            if n < 14:
+                rsi = np.nan
+            elif avg_loss == 0:
+                rsi = np.float64(100.0)
+            else:
+                rsi = 100 - (100 / (1 + avg_gain / avg_loss))
+            indicators['rsi'] = round(rsi, 2)
+            
+            # MACD; the signal line starts where the slow EMA has warmed up. As with
+            # ta's macd_diff, 'macd' reports the MACD minus its signal line
+            macd = ema_12 - ema_26
+            macd_signal = _ewma(macd[25:], 2 / 10)[-1] if n >= 34 else np.nan
+            macd_diff = (macd[-1] if n >= 26 else np.nan) - macd_signal
+            indicators['macd'] = round(macd_diff, 4)
+            indicators['macd_signal'] = round(macd_signal, 4)
+            indicators['macd_histogram'] = round(macd_diff - macd_signal, 4)
+            
+            # Bollinger Bands (population std, as ta uses)
+            bb_std = close[-20:].std() if n >= 20 else np.nan
+            bb_high = sma_20 + 2 * bb_std
+            bb_low = sma_20 - 2 * bb_std
+            indicators['bb_upper'] = round(bb_high, 2)
+            indicators['bb_lower'] = round(bb_low, 2)
+            indicators['bb_width'] = round((bb_high - bb_low) / close[-1] * 100, 2)
+            
+            indicators['atr'] = round(_latest_atr(data), 2)
+            
+            # Stochastic: %K over 14 bars and its 3-bar average %D
+            stoch_k = stoch_d = np.nan
+            if n >= 14:
+                lowest = sliding_window_view(low[-16:], 14).min(axis=1)
+                highest = sliding_window_view(high[-16:], 14).max(axis=1)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    k = 100 * (close[-len(lowest):] - lowest) / (highest - lowest)
+                stoch_k = k[-1]
+                if len(k) == 3:
+                    stoch_d = k.mean()
+            indicators['stoch_k'] = round(stoch_k, 2)
+            indicators['stoch_d'] = round(stoch_d, 2)
             
             # Volume indicators
-            indicators['volume_sma'] = round(ta.volume.volume_sma(data['Close'], data['Volume']).iloc[-1], 0)
+            indicators['volume_sma'] = round(_tail_mean(volume, 20), 0)
             
             return indicators
             
@@ -809,18 +868,19 @@ class ChartAnalyzer:
         try:
             highs = data['High'].values
             lows = data['Low'].values
+            span = 2 * window + 1
             
-            # Find pivot highs (resistance)
+            # Find pivot highs (resistance): bars equal to the max of the window centred on them
             resistance_levels = []
-            for i in range(window, len(highs) - window):
-                if highs[i] == max(highs[i-window:i+window+1]):
-                    resistance_levels.append(highs[i])
+            if len(highs) >= span:
+                centres = highs[window:len(highs) - window]
+                resistance_levels = list(centres[centres == sliding_window_view(highs, span).max(axis=1)])
             
             # Find pivot lows (support)
             support_levels = []
-            for i in range(window, len(lows) - window):
-                if lows[i] == min(lows[i-window:i+window+1]):
-                    support_levels.append(lows[i])
+            if len(lows) >= span:
+                centres = lows[window:len(lows) - window]
+                support_levels = list(centres[centres == sliding_window_view(lows, span).min(axis=1)])
             
             # Remove duplicates and sort
             resistance_levels = sorted(list(set(resistance_levels)), reverse=True)
@@ -19,6 +19,12 @@ import os
 
 logger = logging.getLogger(__name__)
 
+# VADER degrades badly on very long or emoticon-heavy text, so such input
+# is scored with TextBlob instead
+VADER_MAX_TEXT_LENGTH = 2000
+VADER_MAX_EMOTICON_RATIO = 0.05
+_EMOTICON_CHARS = frozenset(':;=()|')
+
 class SentimentAnalyzer:
     """
     Analyzes sentiment from news articles and social media related to stocks
@@ -215,12 +221,21 @@ class SentimentAnalyzer:
     def _get_vader_sentiment(self, text: str) -> float:
         """Get VADER sentiment score"""
         try:
+            if not self._is_vader_safe(text):
+                return self._get_textblob_sentiment(text)
             scores = self.vader_analyzer.polarity_scores(text)
             return scores['compound']
         except Exception as e:
             logger.warning(f"Error in VADER analysis: {str(e)}")
             return 0.0
     
+    def _is_vader_safe(self, text: str) -> bool:
+        """Check that text is short and plain enough for VADER"""
+        if len(text) > VADER_MAX_TEXT_LENGTH:
+            return False
+        emoticons = sum(1 for ch in text if ch in _EMOTICON_CHARS)
+        return emoticons / max(len(text), 1) <= VADER_MAX_EMOTICON_RATIO
+    
     def _get_textblob_sentiment(self, text: str) -> float:
         """Get TextBlob sentiment score"""
         try:
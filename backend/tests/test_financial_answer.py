@@ -0,0 +1,21 @@
+"""Tests for the topic dispatch in get_financial_answer"""
+
+import pytest
+
+import app
+
+
+@pytest.mark.parametrize('question, topic', [
+    ('What is RSI?', 'rsi'),
+    ('macd or rsi?', 'rsi'),
+    ('Support levels vs MACD', 'macd'),
+    ('bollinger bands and resistance', 'bollinger'),
+    ('How do I diversify around support?', 'sr'),
+    ('Should I diversify?', 'div'),
+])
+def test_topic_priority(question, topic):
+    assert app.get_financial_answer(question) == app.FINANCIAL_ANSWERS[topic]
+
+
+def test_unknown_topic_gets_default_answer():
+    assert app.get_financial_answer('What is a stock split?') == app.DEFAULT_FINANCIAL_ANSWER
@@ -0,0 +1,50 @@
+"""Regression tests for search_stock_by_input and its lookup indices in app.py"""
+
+import pytest
+
+import app
+
+
+def _scan(user_input):
+    """The plain list scan the indices replace: symbol, then name, then keyword"""
+    user_input = user_input.lower().strip()
+    for stock in app._ALL_STOCKS:
+        if stock['symbol'].lower() == user_input:
+            return stock
+    for stock in app._ALL_STOCKS:
+        if user_input in stock['name'].lower():
+            return stock
+    for stock in app._ALL_STOCKS:
+        for keyword in stock['keywords']:
+            if user_input in keyword or keyword in user_input:
+                return stock
+    return None
+
+
+def _queries():
+    queries = {'electricity', 'it services', 'oil and gas company', 'steel it', 'xyz'}
+    for stock in app._ALL_STOCKS:
+        queries.update((stock['symbol'], stock['name'], *stock['keywords']))
+        queries.update(keyword[1:] for keyword in stock['keywords'])
+    return sorted(queries)
+
+
+@pytest.mark.parametrize('query, symbol', [
+    ('electricity', 'TCS'),
+    ('it services', 'TCS'),
+    ('infosys', 'INFY'),
+    ('bank', 'HDFCBANK'),
+    ('power', 'NTPC'),
+    ('xyz', None),
+])
+def test_search_examples(query, symbol):
+    stock = app.search_stock_by_input(query)
+    assert (stock and stock['symbol']) == symbol
+
+
+@pytest.mark.parametrize('automaton', [True, False])
+def test_search_matches_list_scan(monkeypatch, automaton):
+    if not automaton:
+        monkeypatch.setattr(app, '_KEYWORD_AUTOMATON', None)
+    for query in _queries():
+        assert app.search_stock_by_input(query) is _scan(query), query
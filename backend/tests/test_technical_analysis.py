@@ -0,0 +1,34 @@
+"""Regression tests for the NumPy technical-analysis helpers in app.py"""
+
+import numpy as np
+import pytest
+
+import app
+
+
+@pytest.mark.parametrize('price', [83.62, 2456.35, 3185.17])
+@pytest.mark.parametrize('length', [20, 35, 60, 120])
+def test_flat_series_has_no_macd_crossover(price, length):
+    close_prices = np.full(length, price)
+    
+    macd = app._ewm_mean(close_prices, 12) - app._ewm_mean(close_prices, 26)
+    signal = app._ewm_mean(macd, 9)
+    assert macd[-1] == 0.0
+    assert signal[-1] == 0.0
+    
+    analysis = app.analyze_close_prices(close_prices)
+    assert analysis['indicators']['macd'] == 0.0
+    assert analysis['indicators']['macd_signal'] == 0.0
+    assert analysis['signals'] == ['MACD Bearish']
+    assert analysis['strength'] == 'weak'
+    assert analysis['strength_score'] == -2
+    assert analysis['trend'] == ('neutral' if length >= 50 else 'bearish')
+
+
+def test_ewm_mean_matches_pandas():
+    pd = pytest.importorskip('pandas')
+    rng = np.random.default_rng(0)
+    close_prices = 100 * np.cumprod(1 + rng.normal(0, 0.02, 300))
+    for span in (9, 12, 26):
+        expected = pd.Series(close_prices).ewm(span=span).mean().to_numpy()
+        np.testing.assert_allclose(app._ewm_mean(close_prices, span), expected, rtol=1e-12)
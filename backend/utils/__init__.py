@@ -15,6 +15,7 @@ __all__ = [
     'format_currency',
     'validate_stock_symbol',
     'normalize_stock_symbol',
+    'strip_exchange_suffix',
     'calculate_percentage_change',
     'DataFetcher'
 ]
\ No newline at end of file
@@ -6,7 +6,9 @@ Contains common utility functions used across the application
 import logging
 import os
 import json
+import time
 from datetime import datetime, timedelta
+from functools import lru_cache
 import pandas as pd
 import numpy as np
 from typing import Dict, List, Any, Optional
@@ -44,12 +46,19 @@ def is_market_open():
     """
     Check if Indian stock market is currently open
     
+    The result only changes at minute boundaries, so it is computed once
+    per wall-clock minute and reused.
+    
     Returns:
         bool: True if market is open, False otherwise
     """
+    return _market_open_for_minute(int(time.time() // 60))
+
+@lru_cache(maxsize=1)
+def _market_open_for_minute(minute_bucket: int) -> bool:
     try:
         tz = get_market_timezone()
-        now = datetime.now(tz)
+        now = datetime.fromtimestamp(minute_bucket * 60, tz)
         
         # Check if it's a weekday (Monday = 0, Sunday = 6)
         if now.weekday() >= 5:  # Saturday or Sunday
@@ -148,6 +157,19 @@ def normalize_stock_symbol(symbol: str, exchange: str = 'NS') -> str:
         logging.error(f"Error normalizing stock symbol: {str(e)}")
         return symbol
 
+@lru_cache(maxsize=4096)
+def strip_exchange_suffix(symbol: str) -> str:
+    """
+    Upper-case a user-supplied symbol and drop a trailing .NS suffix
+    
+    Args:
+        symbol: Stock symbol as entered (e.g., 'tcs.ns')
+        
+    Returns:
+        Bare symbol (e.g., 'TCS'); results are cached since the symbol space is small
+    """
+    return symbol.upper().removesuffix('.NS') if symbol else ''
+
 def calculate_percentage_change(old_value: float, new_value: float) -> float:
     """
     Calculate percentage change between two values
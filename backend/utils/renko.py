@@ -80,7 +80,7 @@ class Renko:
                 return avg_price * 0.01
             
             # Calculate Average True Range (ATR) for brick size
-            high_low = self.data.rolling(2).apply(lambda x: abs(x.iloc[1] - x.iloc[0]), raw=False)
+            high_low = self.data.diff().abs()
             atr = high_low.rolling(14).mean().iloc[-1]
             
             # Use ATR or 0.5% of current price, whichever is larger
@@ -0,0 +1,4 @@
+"""WSGI entry point for production servers, e.g. ``gunicorn wsgi:app``
+(settings are read from gunicorn.conf.py)"""
+
+from app import app